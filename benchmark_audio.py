@@ -0,0 +1,61 @@
+"""
+Ovozni tayyorlash benchmarki
+Foydalanish: python benchmark_audio.py voice1.ogg voice2.ogg ... [--transcribe]
+
+Har bir fayl uchun: asl va tayyorlangan hajm, ffmpeg vaqti,
+--transcribe bilan - Whisper javob vaqti (asl va tayyorlangan, ffmpeg vaqti bilan birga)
+"""
+import asyncio
+import sys
+import time
+
+import config
+from services.audio_processor import ffmpeg_available, preprocess_audio
+
+
+async def benchmark(paths, transcribe: bool = False):
+    if not ffmpeg_available():
+        print(f"[XATO] ffmpeg topilmadi ({config.FFMPEG_PATH})")
+        return
+
+    config.AUDIO_PREPROCESS = True
+    ai_service = None
+    if transcribe:
+        from services.ai_service import AIService
+        ai_service = AIService()
+
+    total_before = total_after = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            audio = f.read()
+
+        started = time.perf_counter()
+        processed = await preprocess_audio(audio)
+        elapsed = time.perf_counter() - started
+
+        total_before += len(audio)
+        total_after += len(processed)
+        saved = 100 * (1 - len(processed) / len(audio)) if audio else 0
+        print(f"{path}: {len(audio):,} -> {len(processed):,} bayt ({saved:.0f}% kam), ffmpeg {elapsed * 1000:.0f} ms")
+
+        if ai_service:
+            # transcribe_voice o'zi tayyorlaydi - asl fayl ikkala holatda, sozlama bilan
+            for label, preprocess in (("asl", False), ("tayyorlangan", True)):
+                config.AUDIO_PREPROCESS = preprocess
+                started = time.perf_counter()
+                text, _ = await ai_service.transcribe_voice(audio)
+                elapsed = time.perf_counter() - started
+                print(f"  Whisper ({label}): {elapsed * 1000:.0f} ms - {text!r}")
+            config.AUDIO_PREPROCESS = True
+
+    if total_before:
+        print(f"\nJami: {total_before:,} -> {total_after:,} bayt "
+              f"({100 * (1 - total_after / total_before):.0f}% kam)")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    asyncio.run(benchmark(args, transcribe="--transcribe" in sys.argv))
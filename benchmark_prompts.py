@@ -0,0 +1,81 @@
+"""
+Prompt benchmarki
+Foydalanish: python benchmark_prompts.py [--live] [fixtures/transactions.json]
+
+Har bir shablon va versiya uchun prompt hajmi (taxminiy tokenlar):
+o'zgarmas tizim qismi va har so'rovdagi qism alohida.
+--live bilan - tranzaksiya shabloni fixture korpusida AI orqali tekshiriladi:
+tahlil aniqligi (tur, summa, kategoriya) va haqiqiy token sarfi.
+"""
+import asyncio
+import json
+import sys
+import time
+
+import config
+from services.prompts import TEMPLATES, build_prompt
+from utils.token_counter import estimate_tokens
+
+SAMPLE_DATA = {
+    "transaction": {"text": "Taxi uchun 15000 to'ladim"},
+    "diary": {"text": "Bugun ishda yaxshi kun bo'ldi, loyiha topshirildi."},
+    "weekly": {"total_income": 3000000, "total_expense": 1850000, "balance": 1150000, "top_category": "Oziq-ovqat"},
+    "monthly": {"total_income": 12000000, "total_expense": 9400000, "balance": 2600000, "goals_progress": "2 ta maqsad"},
+}
+
+
+def report_sizes():
+    print(f"{'Shablon':<12} {'Versiya':<8} {'Tizim':>7} {'So`rov':>7} {'Jami':>7}")
+    for kind, versions in TEMPLATES.items():
+        for version in versions:
+            prompt = build_prompt(kind, version=version, **SAMPLE_DATA[kind])
+            system = estimate_tokens(prompt.system)
+            user = estimate_tokens(prompt.user)
+            print(f"{kind:<12} {version:<8} {system:>7} {user:>7} {estimate_tokens(prompt):>7}")
+
+
+def _matches(result, expected) -> bool:
+    if not result or len(result) != len(expected):
+        return False
+    for got, want in zip(result, expected):
+        if got["type"] != want["type"] or float(got["amount"]) != float(want["amount"]):
+            return False
+        if got["category"] != want["category"]:
+            return False
+    return True
+
+
+async def run_live(corpus_path: str):
+    from services.ai_service import AIService
+    from services.response_parser import parse_transactions
+
+    with open(corpus_path, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    ai_service = AIService()
+    print(f"\nKorpus: {corpus_path} ({len(corpus)} ta)")
+    for version in TEMPLATES["transaction"]:
+        correct = tokens_total = 0
+        started = time.perf_counter()
+        for case in corpus:
+            prompt = build_prompt("transaction", version=version, json_mode=config.AI_JSON_MODE, text=case["text"])
+            result, tokens = await ai_service._hedged_call(
+                prompt, parse=parse_transactions, json_mode=config.AI_JSON_MODE
+            )
+            tokens_total += tokens
+            if _matches(result, case["expected"]):
+                correct += 1
+            else:
+                print(f"  [{version}] xato: {case['text']!r} -> {result}")
+        elapsed = time.perf_counter() - started
+        print(
+            f"{version}: aniqlik {correct}/{len(corpus)} ({100 * correct / len(corpus):.0f}%), "
+            f"o'rtacha {tokens_total / len(corpus):.0f} token, {elapsed / len(corpus):.2f}s/so'rov"
+        )
+
+
+if __name__ == "__main__":
+    report_sizes()
+    if "--live" in sys.argv:
+        paths = [a for a in sys.argv[1:] if not a.startswith("--")]
+        asyncio.run(run_live(paths[0] if paths else "fixtures/transactions.json"))
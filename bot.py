@@ -15,6 +15,9 @@ from aiogram.fsm.storage.memory import MemoryStorage
 
 import config
 from database.models import DatabaseModels
+from database.db import Database
+from database.tuning import maintenance_loop
+from utils.token_counter import estimator
 from handlers import start, finance, goals, diary, reports, settings
 
 # Logging sozlash
@@ -45,6 +48,11 @@ async def main():
     # Database yaratish
     try:
         await DatabaseModels.create_tables(config.DATABASE_PATH)
+        database = Database()
+        await database.connect()
+        
+        # Token baholovchisini saqlangan haqiqiy sarf bo'yicha kalibrlash
+        estimator.load(await database.get_token_samples(config.TOKEN_SAMPLES_HISTORY))
         logger.info("✅ Database tayyor")
     except Exception as e:
         logger.error(f"❌ Database xato: {e}")
@@ -69,6 +77,12 @@ async def main():
     
     logger.info("✅ Handlerlar yuklandi")
     
+    # Database texnik xizmati (checkpoint, optimize, vacuum)
+    maintenance_task = asyncio.create_task(maintenance_loop(database.pool))
+    
+    # AI usage buffer'ni davriy yozish
+    usage_task = asyncio.create_task(database.usage.run())
+    
     # Botni ishga tushirish
     try:
         logger.info("✅ Bot ishga tushdi!")
@@ -76,7 +90,10 @@ async def main():
     except Exception as e:
         logger.error(f"❌ Bot xato: {e}")
     finally:
+        maintenance_task.cancel()
+        usage_task.cancel()
         await bot.session.close()
+        await database.close()
         logger.info("👋 Bot to'xtatildi")
 
 if __name__ == "__main__":
@@ -18,6 +18,24 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 # Database
 DATABASE_PATH = os.getenv("DATABASE_PATH", "database/aris.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 4))  # O'quvchi ulanishlar soni
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", 5000))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", 16384))  # Har bir ulanish uchun sahifa keshi
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", 128 * 1024 * 1024))  # Memory-mapped I/O (bayt)
+DB_MAINTENANCE_INTERVAL = int(os.getenv("DB_MAINTENANCE_INTERVAL", 3600))  # Soniya
+DB_VACUUM_PAGES = int(os.getenv("DB_VACUUM_PAGES", 500))  # Har safar bo'shatiladigan sahifalar
+
+# Foydalanuvchi keshi (get_user)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 2048))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 300))  # Soniya
+
+# AI hisobot tahlillari keshi (ma'lumot o'zgarmasa - qayta so'rov yuborilmaydi)
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", 1024))
+REPORT_CACHE_TTL = int(os.getenv("REPORT_CACHE_TTL", 86400))  # Soniya
+
+# AI usage write-behind buffer
+USAGE_FLUSH_INTERVAL = int(os.getenv("USAGE_FLUSH_INTERVAL", 10))  # Soniya
+USAGE_FLUSH_EVENTS = int(os.getenv("USAGE_FLUSH_EVENTS", 50))  # Shuncha yozuvdan keyin darhol flush
 
 # Admin Users (user_id ro'yxati)
 ADMIN_USERS = [
@@ -93,6 +111,74 @@ INCOME_CATEGORIES = [
 GROQ_MODEL = "llama-3.3-70b-versatile"
 GROQ_WHISPER_MODEL = "whisper-large-v3"
 GEMINI_MODEL = "gemini-2.0-flash-exp"
+AI_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", 30))  # Bitta AI so'rov uchun (soniya)
+
+# Ovoz
+VOICE_TEMP_FILES = os.getenv("VOICE_TEMP_FILES", "false").lower() == "true"  # Ovozni temp/ orqali o'tkazish
+VOICE_CACHE_SIZE = int(os.getenv("VOICE_CACHE_SIZE", 2000))  # Ovoz transkripsiyalari keshi (file_unique_id)
+# Whisper'dan oldin tayyorlash (ffmpeg kerak): jimlikni kesish, 16 kHz mono
+AUDIO_PREPROCESS = os.getenv("AUDIO_PREPROCESS", "false").lower() == "true"
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+AUDIO_SILENCE_THRESHOLD_DB = int(os.getenv("AUDIO_SILENCE_THRESHOLD_DB", -45))
+AUDIO_BITRATE = os.getenv("AUDIO_BITRATE", "16k")
+# Uzun ovozlar bo'laklarga bo'linib parallel o'giriladi (soniya)
+AUDIO_CHUNK_SECONDS = float(os.getenv("AUDIO_CHUNK_SECONDS", 40))
+AUDIO_CHUNK_OVERLAP = 1.0  # Bo'laklar ustma-ust qismi
+AUDIO_CHUNK_MIN_SILENCE = 0.4  # Kesish uchun eng qisqa jimlik
+
+# Hedging: javob kechiksa keyingi provayder parallel chaqiriladi
+AI_HEDGE_ENABLED = os.getenv("AI_HEDGE_ENABLED", "true").lower() == "true"
+AI_HEDGE_DELAY = float(os.getenv("AI_HEDGE_DELAY", 3.0))  # Maksimal kutish (soniya)
+AI_HEDGE_MIN_DELAY = float(os.getenv("AI_HEDGE_MIN_DELAY", 0.5))
+AI_HEDGE_MIN_SAMPLES = 20  # p95 hisoblash uchun kerakli javoblar soni
+
+# Lokal parser: oddiy matnlar AI'siz tahlil qilinadi
+LOCAL_PARSER_ENABLED = os.getenv("LOCAL_PARSER_ENABLED", "true").lower() == "true"
+LOCAL_PARSER_MIN_CONFIDENCE = float(os.getenv("LOCAL_PARSER_MIN_CONFIDENCE", 0.9))
+LOCAL_PARSER_MAX_LENGTH = 200  # Uzunroq matnlar AI'ga yuboriladi
+
+# Tranzaksiya tahlili keshi (bir xil matn - AI chaqirilmaydi)
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", 5000))
+AI_CACHE_PERSIST = os.getenv("AI_CACHE_PERSIST", "true").lower() == "true"  # SQLite'da saqlash
+AI_CACHE_TTL_DAYS = int(os.getenv("AI_CACHE_TTL_DAYS", 30))
+
+# Circuit breaker: ishlamayotgan provayder vaqtincha tashlab ketiladi
+AI_BREAKER_WINDOW = float(os.getenv("AI_BREAKER_WINDOW", 120))  # Kuzatuv oynasi (soniya)
+AI_BREAKER_MIN_REQUESTS = int(os.getenv("AI_BREAKER_MIN_REQUESTS", 5))
+AI_BREAKER_ERROR_RATE = float(os.getenv("AI_BREAKER_ERROR_RATE", 0.5))
+AI_BREAKER_CONSECUTIVE_FAILURES = int(os.getenv("AI_BREAKER_CONSECUTIVE_FAILURES", 3))
+AI_BREAKER_COOLDOWN = float(os.getenv("AI_BREAKER_COOLDOWN", 30))  # O'chirilgan holat (soniya)
+
+# Rate limit: har bir kalit uchun daqiqalik so'rov va token byudjeti
+GROQ_RPM = int(os.getenv("GROQ_RPM", 30))
+GROQ_TPM = int(os.getenv("GROQ_TPM", 6000))
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", 15))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", 1000000))
+AI_RATE_MAX_WAIT = float(os.getenv("AI_RATE_MAX_WAIT", 2.0))  # Byudjet uchun kutish chegarasi (soniya)
+AI_RATE_LIMIT_BACKOFF = float(os.getenv("AI_RATE_LIMIT_BACKOFF", 10))  # 429 dan keyin (soniya)
+AI_COMPLETION_TOKENS_ESTIMATE = 300  # Javob uchun taxminiy tokenlar
+AI_JSON_MODE = os.getenv("AI_JSON_MODE", "true").lower() == "true"  # Provayderning JSON rejimi (tranzaksiya tahlili)
+
+# Micro-batching: bir vaqtda kelgan tranzaksiya matnlari bitta AI so'roviga birlashtiriladi
+AI_BATCHING = os.getenv("AI_BATCHING", "false").lower() == "true"
+AI_BATCH_WINDOW_MS = int(os.getenv("AI_BATCH_WINDOW_MS", 30))  # Yig'ish oynasi
+AI_BATCH_MAX_SIZE = int(os.getenv("AI_BATCH_MAX_SIZE", 8))
+
+# Token hisobi: Whisper audio soniyalari tokenga aylantiriladi, baholovchi tarixdan kalibrlanadi
+WHISPER_TOKENS_PER_SECOND = int(os.getenv("WHISPER_TOKENS_PER_SECOND", 25))
+WHISPER_MIN_BILLED_SECONDS = 10  # Groq bitta so'rov uchun kamida 10 soniya hisoblaydi
+TOKEN_CALIBRATION_MIN_SAMPLES = 30
+TOKEN_SAMPLES_HISTORY = 2000  # Ishga tushganda yuklanadigan namunalar soni
+TOKEN_SAMPLES_BATCH = 20  # Shuncha namuna to'planganda yoziladi
+
+# Oqim (stream) bilan kelayotgan AI javobida xabarni yangilash oralig'i
+AI_STREAMING = os.getenv("AI_STREAMING", "true").lower() == "true"
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", 1.2))  # Telegram: ~1 edit/soniya
+STREAM_EDIT_MIN_CHARS = 40  # Kamida shuncha yangi belgi bo'lsa
+
+# AI ishlar navbati: bir vaqtda bajariladigan va navbatda kutadigan so'rovlar chegarasi
+AI_MAX_IN_FLIGHT = int(os.getenv("AI_MAX_IN_FLIGHT", 8))
+AI_QUEUE_MAX_SIZE = int(os.getenv("AI_QUEUE_MAX_SIZE", 200))
 
 # Prompt shablonlari
 TRANSACTION_ANALYSIS_PROMPT = """Matndan moliyaviy ma'lumotlarni ajratib, JSON array qaytaring:
@@ -121,6 +207,43 @@ Kirim: Maosh, Biznes, Sovg'a, Investitsiya, Boshqa
 
 Faqat JSON array, boshqa hech narsa."""
 
+# Prompt versiyasi: v1 - yuqoridagi to'liq shablonlar, v2 - tizim ko'rsatmasi + qisqa so'rov
+PROMPT_VERSION = os.getenv("PROMPT_VERSION", "v2")
+
+# v2: o'zgarmas tizim ko'rsatmalari (provayder prompt keshi uchun) va so'rov ma'lumoti
+TRANSACTION_SYSTEM_PROMPT = """Matndan moliyaviy tranzaksiyalarni ajratib, faqat JSON array qaytaring:
+[{"type": "expense" yoki "income", "amount": son, "category": "...", "description": "qisqa"}]
+
+So'z bilan yozilgan sonlarni raqamga o'giring: "besh ming" = 5000, "ikki yarim million" = 2500000.
+
+Kategoriyalar - Chiqim: Oziq-ovqat, Transport, Uy-joy, Sog'liq, Ta'lim, O'yin-kulgi, Kiyim, Aloqa, Boshqa
+Kirim: Maosh, Biznes, Sovg'a, Investitsiya, Boshqa"""
+TRANSACTION_USER_TEMPLATE = "Matn: {text}"
+
+DIARY_SYSTEM_PROMPT = "Kundalikni tahlil qiling (3-4 jumla): 1. Kayfiyat 2. Muhim voqea 3. Maslahat"
+DIARY_USER_TEMPLATE = "{text}"
+
+WEEKLY_REPORT_SYSTEM_PROMPT = "Haftalik moliyaviy tahlil va maslahat bering (5 jumla)."
+WEEKLY_REPORT_USER_TEMPLATE = """Kirim: {total_income} | Chiqim: {total_expense} | Balans: {balance}
+Eng ko'p: {top_category}"""
+
+MONTHLY_REPORT_SYSTEM_PROMPT = "Oylik moliyaviy hisobot: batafsil tahlil va strategiya (8-10 jumla)."
+MONTHLY_REPORT_USER_TEMPLATE = """Kirim: {total_income} | Chiqim: {total_expense} | Balans: {balance}
+Maqsadlar: {goals_progress}"""
+
+# Bir nechta matn bitta so'rovda (micro-batching)
+TRANSACTION_BATCH_SUFFIX = """
+
+Bir nechta matn JSON obyekt ko'rinishida beriladi: {"1": "matn", "2": "matn"}.
+Har bir kalit - bitta alohida matn (ichidagi qatorlar va raqamlar shu matnga tegishli).
+Har bir kalit uchun alohida array, JSON obyekt ko'rinishida:
+{"results": {"1": [...], "2": [...]}}"""
+
+# JSON mode yoqilganda (javob obyekt bo'lishi kerak)
+TRANSACTION_JSON_MODE_SUFFIX = """
+
+Javobni JSON obyekt ko'rinishida qaytaring: {"transactions": [...]}"""
+
 DIARY_ANALYSIS_PROMPT = """Kundalik tahlil (3-4 jumla):
 
 {text}
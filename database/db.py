@@ -3,11 +3,22 @@ Database Operations
 Barcha database operatsiyalari - Modular struktura
 """
 import config
+from utils.cache import LRUCache, ReportCache, VersionGuard
+from .pool import get_pool
+from .usage_buffer import get_usage_buffer
 from .operations.user_ops import UserOperations
 from .operations.transaction_ops import TransactionOperations
 from .operations.goal_ops import GoalOperations
 from .operations.diary_ops import DiaryOperations
 from .operations.admin_ops import AdminOperations
+from .operations.cache_ops import CacheOperations
+
+
+# Har bir database fayli uchun umumiy foydalanuvchi keshi
+_user_caches = {}
+_user_guards = {}
+# AI hisobot tahlillari keshi (tranzaksiya/maqsad o'zgarsa bekor qilinadi)
+_report_caches = {}
 
 
 class Database(
@@ -15,9 +26,33 @@ class Database(
     TransactionOperations,
     GoalOperations,
     DiaryOperations,
-    AdminOperations
+    AdminOperations,
+    CacheOperations
 ):
     """Barcha database operatsiyalari - Bir joyda"""
     
     def __init__(self, db_path: str = None):
         self.db_path = db_path or config.DATABASE_PATH
+        self.pool = get_pool(self.db_path)
+        self.usage = get_usage_buffer(self.pool)
+        
+        if self.db_path not in _user_caches:
+            _user_caches[self.db_path] = LRUCache(config.USER_CACHE_SIZE, config.USER_CACHE_TTL)
+        self.user_cache = _user_caches[self.db_path]
+        # O'qish paytidagi yozuvlarni kuzatish (eskirgan qator keshga tushmasligi uchun)
+        if self.db_path not in _user_guards:
+            _user_guards[self.db_path] = VersionGuard()
+        self.user_guard = _user_guards[self.db_path]
+        
+        if self.db_path not in _report_caches:
+            _report_caches[self.db_path] = ReportCache(config.REPORT_CACHE_SIZE, config.REPORT_CACHE_TTL)
+        self.report_cache = _report_caches[self.db_path]
+    
+    async def connect(self):
+        """Ulanishlar pool'ini ochish (bot ishga tushganda)"""
+        await self.pool.open()
+    
+    async def close(self):
+        """Ulanishlar pool'ini yopish (bot to'xtaganda)"""
+        await self.usage.flush()
+        await self.pool.close()
@@ -0,0 +1,200 @@
+"""
+Database Migrations
+Versiyalangan sxema o'zgarishlari (schema_version jadvali orqali)
+"""
+import aiosqlite
+from typing import List, Tuple
+
+# Kunlik yig'indilarni transactions jadvalidan qayta hisoblash
+DAILY_ROLLUP_BACKFILL = [
+    "DELETE FROM daily_rollup",
+    """INSERT INTO daily_rollup (user_id, day, type, category, total, count)
+       SELECT user_id, date, type, category, SUM(amount), COUNT(*)
+       FROM transactions
+       GROUP BY user_id, date, type, category""",
+]
+
+# (versiya, tavsif, SQL buyruqlar) - faqat oxiriga qo'shing, tartibni o'zgartirmang
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (
+        1,
+        "transactions indekslari",
+        [
+            # get_transactions / get_statistics: user_id + sana oralig'i (covering)
+            """CREATE INDEX IF NOT EXISTS idx_transactions_user_date
+               ON transactions (user_id, date, type, category, amount)""",
+            # Admin statistika: sana bo'yicha hisoblash
+            """CREATE INDEX IF NOT EXISTS idx_transactions_date
+               ON transactions (date, user_id)""",
+        ],
+    ),
+    (
+        2,
+        "ai_usage indeksi",
+        [
+            """CREATE INDEX IF NOT EXISTS idx_ai_usage_user_date
+               ON ai_usage (user_id, date, tokens_used)""",
+        ],
+    ),
+    (
+        3,
+        "goals indeksi",
+        [
+            """CREATE INDEX IF NOT EXISTS idx_goals_user_status
+               ON goals (user_id, status, created_at)""",
+        ],
+    ),
+    (
+        4,
+        "diary indeksi",
+        [
+            """CREATE INDEX IF NOT EXISTS idx_diary_user_date
+               ON diary (user_id, date, created_at)""",
+        ],
+    ),
+    (
+        5,
+        "users indeksi",
+        [
+            """CREATE INDEX IF NOT EXISTS idx_users_created_at
+               ON users (created_at)""",
+        ],
+    ),
+    (
+        6,
+        "daily_rollup jadvali va triggerlar",
+        [
+            """CREATE TABLE IF NOT EXISTS daily_rollup (
+                   user_id INTEGER NOT NULL,
+                   day DATE NOT NULL,
+                   type TEXT NOT NULL,
+                   category TEXT NOT NULL,
+                   total REAL NOT NULL DEFAULT 0,
+                   count INTEGER NOT NULL DEFAULT 0,
+                   PRIMARY KEY (user_id, day, type, category)
+               ) WITHOUT ROWID""",
+            """CREATE TRIGGER IF NOT EXISTS trg_rollup_insert
+               AFTER INSERT ON transactions
+               BEGIN
+                   INSERT INTO daily_rollup (user_id, day, type, category, total, count)
+                   VALUES (NEW.user_id, NEW.date, NEW.type, NEW.category, NEW.amount, 1)
+                   ON CONFLICT (user_id, day, type, category) DO UPDATE
+                   SET total = total + excluded.total, count = count + 1;
+               END""",
+            """CREATE TRIGGER IF NOT EXISTS trg_rollup_delete
+               AFTER DELETE ON transactions
+               BEGIN
+                   UPDATE daily_rollup
+                   SET total = total - OLD.amount, count = count - 1
+                   WHERE user_id = OLD.user_id AND day = OLD.date
+                     AND type = OLD.type AND category = OLD.category;
+                   DELETE FROM daily_rollup
+                   WHERE user_id = OLD.user_id AND day = OLD.date
+                     AND type = OLD.type AND category = OLD.category AND count <= 0;
+               END""",
+            """CREATE TRIGGER IF NOT EXISTS trg_rollup_update
+               AFTER UPDATE OF user_id, date, type, category, amount ON transactions
+               BEGIN
+                   UPDATE daily_rollup
+                   SET total = total - OLD.amount, count = count - 1
+                   WHERE user_id = OLD.user_id AND day = OLD.date
+                     AND type = OLD.type AND category = OLD.category;
+                   DELETE FROM daily_rollup
+                   WHERE user_id = OLD.user_id AND day = OLD.date
+                     AND type = OLD.type AND category = OLD.category AND count <= 0;
+                   INSERT INTO daily_rollup (user_id, day, type, category, total, count)
+                   VALUES (NEW.user_id, NEW.date, NEW.type, NEW.category, NEW.amount, 1)
+                   ON CONFLICT (user_id, day, type, category) DO UPDATE
+                   SET total = total + excluded.total, count = count + 1;
+               END""",
+        ] + DAILY_ROLLUP_BACKFILL,
+    ),
+    (
+        7,
+        "analysis_cache jadvali",
+        [
+            """CREATE TABLE IF NOT EXISTS analysis_cache (
+                   key TEXT PRIMARY KEY,
+                   result TEXT NOT NULL,
+                   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+               )""",
+        ],
+    ),
+    (
+        8,
+        "transcription_cache jadvali",
+        [
+            """CREATE TABLE IF NOT EXISTS transcription_cache (
+                   key TEXT PRIMARY KEY,
+                   text TEXT NOT NULL,
+                   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+               )""",
+        ],
+    ),
+    (
+        9,
+        "token_samples jadvali (haqiqiy token sarfi tarixi)",
+        [
+            """CREATE TABLE IF NOT EXISTS token_samples (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   provider TEXT NOT NULL,
+                   chars INTEGER DEFAULT 0,
+                   words INTEGER DEFAULT 0,
+                   prompt_tokens INTEGER DEFAULT 0,
+                   completion_tokens INTEGER DEFAULT 0,
+                   audio_seconds REAL DEFAULT 0,
+                   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+               )""",
+        ],
+    ),
+]
+
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    """Joriy sxema versiyasi"""
+    async with db.execute(
+        "SELECT COALESCE(MAX(version), 0) FROM schema_version"
+    ) as cursor:
+        return (await cursor.fetchone())[0]
+
+
+async def run_migrations(db: aiosqlite.Connection) -> int:
+    """
+    Qo'llanmagan migratsiyalarni tartib bilan bajarish
+
+    Returns:
+        Yangi sxema versiyasi
+    """
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    await db.commit()
+
+    current = await get_schema_version(db)
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+
+        try:
+            # DDL ham bitta tranzaksiya ichida bajarilsin
+            await db.execute("BEGIN")
+            for statement in statements:
+                await db.execute(statement)
+            await db.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        current = version
+        print(f"[OK] Migratsiya {version}: {description}")
+
+    return current
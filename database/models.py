@@ -6,6 +6,9 @@ import aiosqlite
 from datetime import datetime
 from typing import Optional
 
+from .migrations import run_migrations
+from .tuning import configure_database
+
 class DatabaseModels:
     """Database jadvallarini yaratish"""
     
@@ -13,6 +16,9 @@ class DatabaseModels:
     async def create_tables(db_path: str):
         """Barcha jadvallarni yaratish"""
         async with aiosqlite.connect(db_path) as db:
+            # WAL va fayl sozlamalari
+            await configure_database(db)
+            
             # Users jadvali
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -89,4 +95,7 @@ class DatabaseModels:
             """)
             
             await db.commit()
+            
+            # Indekslar va keyingi sxema o'zgarishlari
+            await run_migrations(db)
             print("[OK] Database jadvallari yaratildi")
@@ -2,34 +2,20 @@
 Admin Operations
 Admin va AI tracking bilan bog'liq barcha database operatsiyalari
 """
-import aiosqlite
 from datetime import date, timedelta
 from typing import List, Dict
 
+from ..migrations import DAILY_ROLLUP_BACKFILL
+
 
 class AdminOperations:
     """Admin operatsiyalari"""
     
     async def track_ai_usage(self, user_id: int, service: str, tokens: int) -> bool:
-        """AI ishlatilishini kuzatish"""
+        """AI ishlatilishini kuzatish (xotirada, fon rejimida yoziladi)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute(
-                    """INSERT INTO ai_usage (user_id, service, tokens_used, date) 
-                       VALUES (?, ?, ?, ?)""",
-                    (user_id, service, tokens, date.today())
-                )
-                
-                # User'ning umumiy tokenlarini yangilash
-                await db.execute(
-                    """UPDATE users 
-                       SET tokens_used = tokens_used + ? 
-                       WHERE user_id = ?""",
-                    (tokens, user_id)
-                )
-                
-                await db.commit()
-                return True
+            self.usage.record(user_id, service, tokens)
+            return True
         except Exception as e:
             print(f"❌ AI usage tracking xato: {e}")
             return False
@@ -38,14 +24,22 @@ class AdminOperations:
         """Oylik ishlatilgan tokenlar"""
         try:
             first_day = date(date.today().year, date.today().month, 1)
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute(
-                    """SELECT COALESCE(SUM(tokens_used), 0) as total 
-                       FROM ai_usage 
-                       WHERE user_id = ? AND date >= ?""",
-                    (user_id, first_day)
-                ) as cursor:
-                    return (await cursor.fetchone())[0]
+            for _ in range(3):
+                flushes = self.usage.flushes
+                async with self.pool.reader() as db:
+                    async with db.execute(
+                        """SELECT COALESCE(SUM(tokens_used), 0) as total 
+                           FROM ai_usage 
+                           WHERE user_id = ? AND date >= ?""",
+                        (user_id, first_day)
+                    ) as cursor:
+                        stored = (await cursor.fetchone())[0]
+                # O'qish paytida flush commit bo'lgan bo'lsa - guruh qaysi tomonda ekani noma'lum
+                if self.usage.flushes == flushes:
+                    break
+            
+            # Hali yozilmagan (va yozilayotgan) tokenlar ham hisobga olinadi
+            return stored + self.usage.pending_tokens(user_id, first_day)
         except Exception as e:
             print(f"❌ Token olishda xato: {e}")
             return 0
@@ -53,7 +47,7 @@ class AdminOperations:
     async def get_total_users(self) -> int:
         """Jami foydalanuvchilar soni"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 cursor = await db.execute("SELECT COUNT(*) FROM users")
                 result = await cursor.fetchone()
                 return result[0] if result else 0
@@ -64,7 +58,7 @@ class AdminOperations:
         """Bugun aktiv foydalanuvchilar"""
         try:
             today = date.today().isoformat()
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 cursor = await db.execute(
                     "SELECT COUNT(DISTINCT user_id) FROM transactions WHERE date = ?",
                     (today,)
@@ -77,7 +71,7 @@ class AdminOperations:
     async def get_total_transactions(self) -> int:
         """Jami tranzaksiyalar soni"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 cursor = await db.execute("SELECT COUNT(*) FROM transactions")
                 result = await cursor.fetchone()
                 return result[0] if result else 0
@@ -90,7 +84,7 @@ class AdminOperations:
         week_ago = (date.today() - timedelta(days=7)).isoformat()
         
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.reader() as db:
                 stats = {}
                 
                 # Foydalanuvchilar
@@ -167,8 +161,7 @@ class AdminOperations:
     async def get_all_users(self, limit: int = 50) -> List[Dict]:
         """Barcha foydalanuvchilar ro'yxati"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.pool.reader() as db:
                 cursor = await db.execute(
                     """SELECT user_id, username, first_name, subscription_tier, 
                        tokens_used, created_at
@@ -182,3 +175,60 @@ class AdminOperations:
         except Exception as e:
             print(f"❌ Users list xato: {e}")
             return []
+    
+    async def rebuild_daily_rollup(self) -> int:
+        """
+        daily_rollup jadvalini transactions'dan qayta hisoblash (backfill)
+        
+        Returns:
+            Yozilgan kunlik qatorlar soni (-1 xato bo'lsa)
+        """
+        try:
+            async with self.pool.writer() as db:
+                await db.execute("BEGIN")
+                for statement in DAILY_ROLLUP_BACKFILL:
+                    await db.execute(statement)
+                await db.commit()
+                
+                cursor = await db.execute("SELECT COUNT(*) FROM daily_rollup")
+                return (await cursor.fetchone())[0]
+        except Exception as e:
+            print(f"❌ Rollup qayta hisoblashda xato: {e}")
+            return -1
+    
+    async def add_token_samples(self, samples: List[tuple]) -> bool:
+        """
+        Haqiqiy token sarfi namunalarini saqlash
+        samples: (provider, chars, words, prompt_tokens, completion_tokens, audio_seconds)
+        """
+        try:
+            async with self.pool.writer() as db:
+                await db.executemany(
+                    """INSERT INTO token_samples 
+                       (provider, chars, words, prompt_tokens, completion_tokens, audio_seconds)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    samples
+                )
+                await db.commit()
+                return True
+        except Exception as e:
+            print(f"❌ Token namunalarini saqlashda xato: {e}")
+            return False
+    
+    async def get_token_samples(self, limit: int = 2000) -> List[tuple]:
+        """Oxirgi matnli so'rovlar namunalari (eskisidan yangisiga): (chars, words, prompt, completion)"""
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """SELECT chars, words, prompt_tokens, completion_tokens FROM (
+                           SELECT id, chars, words, prompt_tokens, completion_tokens 
+                           FROM token_samples 
+                           WHERE prompt_tokens > 0 
+                           ORDER BY id DESC LIMIT ?
+                       ) ORDER BY id""",
+                    (limit,)
+                ) as cursor:
+                    return [tuple(row) for row in await cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Token namunalarini o'qishda xato: {e}")
+            return []
@@ -0,0 +1,70 @@
+"""
+Cache Operations
+AI natijalari keshi bilan bog'liq database operatsiyalari
+"""
+import json
+from typing import Any, Optional
+
+
+class CacheOperations:
+    """AI kesh operatsiyalari"""
+    
+    async def get_cached_analysis(self, key: str, max_age_days: int = 30) -> Optional[Any]:
+        """Saqlangan tranzaksiya tahlilini olish"""
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """SELECT result FROM analysis_cache 
+                       WHERE key = ? AND created_at >= datetime('now', ?)""",
+                    (key, f"-{int(max_age_days)} days")
+                ) as cursor:
+                    row = await cursor.fetchone()
+                    return json.loads(row[0]) if row else None
+        except Exception as e:
+            print(f"❌ Kesh o'qishda xato: {e}")
+            return None
+    
+    async def save_cached_analysis(self, key: str, result: Any) -> bool:
+        """Tranzaksiya tahlilini saqlash"""
+        try:
+            async with self.pool.writer() as db:
+                await db.execute(
+                    """INSERT OR REPLACE INTO analysis_cache (key, result) 
+                       VALUES (?, ?)""",
+                    (key, json.dumps(result, ensure_ascii=False))
+                )
+                await db.commit()
+                return True
+        except Exception as e:
+            print(f"❌ Kesh saqlashda xato: {e}")
+            return False
+    
+    async def get_cached_transcription(self, key: str, max_age_days: int = 30) -> Optional[str]:
+        """Saqlangan ovoz transkripsiyasini olish"""
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    """SELECT text FROM transcription_cache 
+                       WHERE key = ? AND created_at >= datetime('now', ?)""",
+                    (key, f"-{int(max_age_days)} days")
+                ) as cursor:
+                    row = await cursor.fetchone()
+                    return row[0] if row else None
+        except Exception as e:
+            print(f"❌ Kesh o'qishda xato: {e}")
+            return None
+    
+    async def save_cached_transcription(self, key: str, text: str) -> bool:
+        """Ovoz transkripsiyasini saqlash"""
+        try:
+            async with self.pool.writer() as db:
+                await db.execute(
+                    """INSERT OR REPLACE INTO transcription_cache (key, text) 
+                       VALUES (?, ?)""",
+                    (key, text)
+                )
+                await db.commit()
+                return True
+        except Exception as e:
+            print(f"❌ Kesh saqlashda xato: {e}")
+            return False
@@ -2,7 +2,6 @@
 Diary Operations
 Kundalik bilan bog'liq barcha database operatsiyalari
 """
-import aiosqlite
 from datetime import date
 from typing import List, Dict
 
@@ -22,7 +21,7 @@ class DiaryOperations:
             diary_date = date.today()
         
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 await db.execute(
                     """INSERT INTO diary (user_id, content, ai_analysis, date) 
                        VALUES (?, ?, ?, ?)""",
@@ -37,8 +36,7 @@ class DiaryOperations:
     async def get_diary(self, user_id: int, limit: int = 10) -> List[Dict]:
         """Kundalik yozuvlarini olish"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.pool.reader() as db:
                 async with db.execute(
                     """SELECT * FROM diary 
                        WHERE user_id = ? 
@@ -2,7 +2,6 @@
 Goal Operations
 Maqsad bilan bog'liq barcha database operatsiyalari
 """
-import aiosqlite
 from datetime import datetime, date
 from typing import List, Dict, Optional
 
@@ -10,6 +9,16 @@ from typing import List, Dict, Optional
 class GoalOperations:
     """Maqsad operatsiyalari"""
     
+    async def _goal_owner(self, db, goal_id: int) -> Optional[int]:
+        """Maqsad egasi (hisobot keshini bekor qilish uchun)"""
+        async with db.execute("SELECT user_id FROM goals WHERE id = ?", (goal_id,)) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else None
+    
+    def _invalidate_reports(self, user_id: Optional[int]):
+        if user_id is not None:
+            self.report_cache.invalidate(user_id)
+    
     async def add_goal(
         self, 
         user_id: int, 
@@ -19,14 +28,15 @@ class GoalOperations:
     ) -> bool:
         """Maqsad qo'shish"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 await db.execute(
                     """INSERT INTO goals (user_id, title, target_amount, deadline) 
                        VALUES (?, ?, ?, ?)""",
                     (user_id, title, target_amount, deadline)
                 )
                 await db.commit()
-                return True
+            self.report_cache.invalidate(user_id)
+            return True
         except Exception as e:
             print(f"❌ Maqsad qo'shishda xato: {e}")
             return False
@@ -34,8 +44,7 @@ class GoalOperations:
     async def get_goals(self, user_id: int, status: str = "active") -> List[Dict]:
         """Maqsadlar ro'yxatini olish"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.pool.reader() as db:
                 async with db.execute(
                     """SELECT * FROM goals 
                        WHERE user_id = ? AND status = ? 
@@ -51,7 +60,8 @@ class GoalOperations:
     async def update_goal_progress(self, goal_id: int, amount: float) -> bool:
         """Maqsad progressini yangilash"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
+                owner = await self._goal_owner(db, goal_id)
                 await db.execute(
                     """UPDATE goals 
                        SET current_amount = current_amount + ?, updated_at = ? 
@@ -59,7 +69,8 @@ class GoalOperations:
                     (amount, datetime.now(), goal_id)
                 )
                 await db.commit()
-                return True
+            self._invalidate_reports(owner)
+            return True
         except Exception as e:
             print(f"❌ Maqsad yangilashda xato: {e}")
             return False
@@ -67,8 +78,7 @@ class GoalOperations:
     async def get_goal_by_id(self, goal_id: int) -> Optional[Dict]:
         """ID bo'yicha maqsadni olish"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.pool.reader() as db:
                 async with db.execute(
                     "SELECT * FROM goals WHERE id = ?", (goal_id,)
                 ) as cursor:
@@ -83,7 +93,7 @@ class GoalOperations:
     async def update_goal(self, goal_id: int, title: str = None, target_amount: float = None, deadline: date = None) -> bool:
         """Maqsadni tahrirlash"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 updates = []
                 params = []
                 
@@ -106,10 +116,12 @@ class GoalOperations:
                 params.append(datetime.now())
                 params.append(goal_id)
                 
+                owner = await self._goal_owner(db, goal_id)
                 query = f"UPDATE goals SET {', '.join(updates)} WHERE id = ?"
                 await db.execute(query, params)
                 await db.commit()
-                return True
+            self._invalidate_reports(owner)
+            return True
         except Exception as e:
             print(f"❌ Maqsad tahrirlashda xato: {e}")
             return False
@@ -117,10 +129,12 @@ class GoalOperations:
     async def delete_goal(self, goal_id: int) -> bool:
         """Maqsadni o'chirish"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
+                owner = await self._goal_owner(db, goal_id)
                 await db.execute("DELETE FROM goals WHERE id = ?", (goal_id,))
                 await db.commit()
-                return True
+            self._invalidate_reports(owner)
+            return True
         except Exception as e:
             print(f"❌ Maqsad o'chirishda xato: {e}")
             return False
@@ -2,9 +2,8 @@
 Transaction Operations
 Tranzaksiya bilan bog'liq barcha database operatsiyalari
 """
-import aiosqlite
-from datetime import date
-from typing import List, Dict
+from datetime import date, timedelta
+from typing import List, Dict, Tuple
 
 
 class TransactionOperations:
@@ -24,7 +23,7 @@ class TransactionOperations:
             trans_date = date.today()
         
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 await db.execute(
                     """INSERT INTO transactions 
                        (user_id, type, amount, category, description, date) 
@@ -32,11 +31,74 @@ class TransactionOperations:
                     (user_id, trans_type, amount, category, description, trans_date)
                 )
                 await db.commit()
-                return True
+            self.report_cache.invalidate(user_id)
+            return True
         except Exception as e:
             print(f"❌ Tranzaksiya qo'shishda xato: {e}")
             return False
     
+    async def add_transactions_bulk(
+        self,
+        user_id: int,
+        transactions: List[Dict],
+        service: str = None,
+        tokens: int = 0,
+        trans_date: date = None
+    ) -> List[int]:
+        """
+        Bir nechta tranzaksiyani bitta tranzaksiyada saqlash
+        (AI ishlatilishi usage buffer orqali yoziladi)
+        
+        Args:
+            user_id: Foydalanuvchi ID
+            transactions: AI natijasi [{"type", "amount", "category", "description"}]
+            service: AI xizmati nomi (ai_usage uchun, ixtiyoriy)
+            tokens: Ishlatilgan tokenlar
+        
+        Returns:
+            Saqlangan tranzaksiyalar ID ro'yxati (xato bo'lsa bo'sh)
+        """
+        if trans_date is None:
+            trans_date = date.today()
+        
+        try:
+            rows = [
+                (
+                    user_id,
+                    item.get("type", "expense"),
+                    float(item.get("amount", 0)),
+                    item.get("category", "Boshqa"),
+                    item.get("description", ""),
+                    trans_date
+                )
+                for item in transactions
+            ]
+            if not rows:
+                return []
+            
+            async with self.pool.writer() as db:
+                await db.executemany(
+                    """INSERT INTO transactions 
+                       (user_id, type, amount, category, description, date) 
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    rows
+                )
+                
+                # Yagona yozuvchi ostida ID'lar ketma-ket beriladi
+                async with db.execute("SELECT last_insert_rowid()") as cursor:
+                    last_id = (await cursor.fetchone())[0]
+                
+                await db.commit()
+            self.report_cache.invalidate(user_id)
+            
+            if service and tokens:
+                self.usage.record(user_id, service, tokens)
+            
+            return list(range(last_id - len(rows) + 1, last_id + 1))
+        except Exception as e:
+            print(f"❌ Tranzaksiyalarni saqlashda xato: {e}")
+            return []
+    
     async def get_transactions(
         self, 
         user_id: int, 
@@ -47,9 +109,7 @@ class TransactionOperations:
     ) -> List[Dict]:
         """Tranzaksiyalar ro'yxatini olish"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                
+            async with self.pool.reader() as db:
                 query = "SELECT * FROM transactions WHERE user_id = ?"
                 params = [user_id]
                 
@@ -87,51 +147,98 @@ class TransactionOperations:
         if end_date is None:
             end_date = date.today()
         
+        periods = await self.get_period_statistics(
+            user_id, {"current": (start_date, end_date)}
+        )
+        return periods.get("current", {})
+    
+    async def get_period_statistics(
+        self,
+        user_id: int,
+        periods: Dict[str, Tuple[date, date]] = None
+    ) -> Dict[str, Dict]:
+        """
+        Bir nechta davr statistikasi - daily_rollup jadvalidan, bitta so'rov bilan
+        
+        Args:
+            user_id: Foydalanuvchi ID
+            periods: {"nom": (boshlanish, tugash)}, standart: default_periods()
+        
+        Returns:
+            {"nom": get_statistics() formatidagi lug'at}
+        """
+        if not periods:
+            periods = default_periods()
+        
+        names = list(periods)
+        columns = []
+        params = []
+        for i, name in enumerate(names):
+            start, end = periods[name]
+            columns.append(
+                f"SUM(CASE WHEN day BETWEEN ? AND ? THEN total ELSE 0 END) AS total_{i}, "
+                f"SUM(CASE WHEN day BETWEEN ? AND ? THEN count ELSE 0 END) AS count_{i}"
+            )
+            params.extend([start, end, start, end])
+        
+        scan_start = min(start for start, _ in periods.values())
+        scan_end = max(end for _, end in periods.values())
+        params.extend([user_id, scan_start, scan_end])
+        
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Jami kirim
+            async with self.pool.reader() as db:
                 async with db.execute(
-                    """SELECT COALESCE(SUM(amount), 0) as total 
-                       FROM transactions 
-                       WHERE user_id = ? AND type = 'income' 
-                       AND date BETWEEN ? AND ?""",
-                    (user_id, start_date, end_date)
+                    f"""SELECT type, category, {', '.join(columns)}
+                       FROM daily_rollup 
+                       WHERE user_id = ? AND day BETWEEN ? AND ?
+                       GROUP BY type, category""",
+                    params
                 ) as cursor:
-                    total_income = (await cursor.fetchone())[0]
-                
-                # Jami chiqim
-                async with db.execute(
-                    """SELECT COALESCE(SUM(amount), 0) as total 
-                       FROM transactions 
-                       WHERE user_id = ? AND type = 'expense' 
-                       AND date BETWEEN ? AND ?""",
-                    (user_id, start_date, end_date)
-                ) as cursor:
-                    total_expense = (await cursor.fetchone())[0]
-                
-                # Kategoriya bo'yicha chiqimlar
-                db.row_factory = aiosqlite.Row
-                async with db.execute(
-                    """SELECT category, SUM(amount) as total 
-                       FROM transactions 
-                       WHERE user_id = ? AND type = 'expense' 
-                       AND date BETWEEN ? AND ?
-                       GROUP BY category 
-                       ORDER BY total DESC""",
-                    (user_id, start_date, end_date)
-                ) as cursor:
-                    expenses_by_category = [dict(row) for row in await cursor.fetchall()]
-                
-                return {
-                    "total_income": total_income,
-                    "total_expense": total_expense,
-                    "balance": total_income - total_expense,
-                    "expenses_by_category": expenses_by_category,
-                    "period": {
-                        "start": start_date.isoformat(),
-                        "end": end_date.isoformat()
-                    }
-                }
+                    rows = await cursor.fetchall()
         except Exception as e:
             print(f"❌ Statistika olishda xato: {e}")
             return {}
+        
+        result = {}
+        for i, name in enumerate(names):
+            start, end = periods[name]
+            total_income = 0
+            total_expense = 0
+            expenses_by_category = []
+            
+            for row in rows:
+                if not row[f"count_{i}"]:
+                    continue
+                total = row[f"total_{i}"]
+                if row["type"] == "income":
+                    total_income += total
+                elif row["type"] == "expense":
+                    total_expense += total
+                    expenses_by_category.append({"category": row["category"], "total": total})
+            
+            expenses_by_category.sort(key=lambda item: item["total"], reverse=True)
+            
+            result[name] = {
+                "total_income": total_income,
+                "total_expense": total_expense,
+                "balance": total_income - total_expense,
+                "expenses_by_category": expenses_by_category,
+                "period": {
+                    "start": start.isoformat(),
+                    "end": end.isoformat()
+                }
+            }
+        
+        return result
+
+
+def default_periods(today: date = None) -> Dict[str, Tuple[date, date]]:
+    """Joriy hafta, o'tgan hafta va joriy oy oraliqlari"""
+    today = today or date.today()
+    week_start = today - timedelta(days=today.weekday())
+    
+    return {
+        "this_week": (week_start, today),
+        "last_week": (week_start - timedelta(days=7), week_start - timedelta(days=1)),
+        "this_month": (today.replace(day=1), today),
+    }
@@ -2,7 +2,6 @@
 User Operations
 Foydalanuvchi bilan bog'liq barcha database operatsiyalari
 """
-import aiosqlite
 from datetime import datetime
 from typing import Optional, Dict
 
@@ -13,45 +12,61 @@ class UserOperations:
     async def add_user(self, user_id: int, username: str = None, first_name: str = None) -> bool:
         """Yangi foydalanuvchi qo'shish"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 await db.execute(
                     """INSERT OR IGNORE INTO users (user_id, username, first_name) 
                        VALUES (?, ?, ?)""",
                     (user_id, username, first_name)
                 )
                 await db.commit()
-                return True
+            self.user_guard.bump(user_id)
+            self.user_cache.pop(user_id)
+            return True
         except Exception as e:
             print(f"❌ User qo'shishda xato: {e}")
             return False
     
     async def get_user(self, user_id: int) -> Optional[Dict]:
-        """Foydalanuvchi ma'lumotlarini olish"""
+        """Foydalanuvchi ma'lumotlarini olish (avval keshdan)"""
+        cached = self.user_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+        
+        version = self.user_guard.begin_read(user_id)
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
+            async with self.pool.reader() as db:
                 async with db.execute(
                     "SELECT * FROM users WHERE user_id = ?", (user_id,)
                 ) as cursor:
                     row = await cursor.fetchone()
-                    if row:
-                        return dict(row)
-                    return None
         except Exception as e:
+            self.user_guard.end_read(user_id, version)
             print(f"❌ User olishda xato: {e}")
             return None
+        
+        # O'qish paytida yozuv bo'lgan bo'lsa - qator eskirgan bo'lishi mumkin, keshlanmaydi
+        unchanged = self.user_guard.end_read(user_id, version)
+        if not row:
+            return None
+        user = dict(row)
+        if unchanged:
+            self.user_cache.set(user_id, user)
+        return dict(user)
     
     async def update_subscription(self, user_id: int, tier: str) -> bool:
         """Tarif o'zgartirish"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            now = datetime.now()
+            async with self.pool.writer() as db:
                 await db.execute(
                     """UPDATE users SET subscription_tier = ?, updated_at = ? 
                        WHERE user_id = ?""",
-                    (tier, datetime.now(), user_id)
+                    (tier, now, user_id)
                 )
                 await db.commit()
-                return True
+            self.user_guard.bump(user_id)
+            self._update_cached_user(user_id, {"subscription_tier": tier}, now)
+            return True
         except Exception as e:
             print(f"❌ Tarif o'zgartirishda xato: {e}")
             return False
@@ -67,7 +82,7 @@ class UserOperations:
     ) -> bool:
         """Foydalanuvchi sozlamalarini yangilash"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.writer() as db:
                 updates = []
                 params = []
                 
@@ -94,14 +109,35 @@ class UserOperations:
                 if not updates:
                     return False
                 
+                now = datetime.now()
                 updates.append("updated_at = ?")
-                params.append(datetime.now())
+                params.append(now)
                 params.append(user_id)
                 
                 query = f"UPDATE users SET {', '.join(updates)} WHERE user_id = ?"
                 await db.execute(query, params)
                 await db.commit()
-                return True
+            
+            # Keshdagi nusxani ham yangilash
+            self.user_guard.bump(user_id)
+            changes = {
+                column.split(" = ")[0]: value
+                for column, value in zip(updates[:-1], params)
+            }
+            self._update_cached_user(user_id, changes, now)
+            return True
         except Exception as e:
             print(f"❌ Sozlamalar yangilashda xato: {e}")
             return False
+    
+    def _update_cached_user(self, user_id: int, changes: Dict, updated_at: datetime):
+        """Keshdagi foydalanuvchini joyida yangilash (bo'lmasa - hech narsa)"""
+        cached = self.user_cache.get(user_id)
+        if cached is None:
+            return
+        
+        user = dict(cached)
+        user.update(changes)
+        # sqlite3 datetime adapteri bilan bir xil format
+        user["updated_at"] = updated_at.isoformat(" ")
+        self.user_cache.set(user_id, user)
@@ -0,0 +1,106 @@
+"""
+Connection Pool
+Uzoq yashovchi aiosqlite ulanishlari: o'quvchilar pool'i va bitta yozuvchi
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiosqlite
+
+import config
+from .tuning import apply_connection_pragmas
+
+
+class ConnectionPool:
+    """Bitta database fayli uchun umumiy ulanishlar"""
+
+    def __init__(self, db_path: str, size: int = None):
+        self.db_path = db_path
+        self.size = max(1, size or config.DB_POOL_SIZE)
+
+        self._readers: Optional[asyncio.Queue] = None
+        self._reader_conns: List[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Pool ochiqmi"""
+        return self._writer is not None
+
+    async def _connect(self) -> aiosqlite.Connection:
+        """Yangi ulanish ochish"""
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        await apply_connection_pragmas(conn)
+        return conn
+
+    async def open(self):
+        """O'quvchi va yozuvchi ulanishlarini ochish"""
+        async with self._open_lock:
+            if self.is_open:
+                return
+
+            self._readers = asyncio.Queue()
+            for _ in range(self.size):
+                conn = await self._connect()
+                self._reader_conns.append(conn)
+                self._readers.put_nowait(conn)
+
+            self._writer = await self._connect()
+
+    async def close(self):
+        """Barcha ulanishlarni yopish"""
+        async with self._open_lock:
+            if not self.is_open:
+                return
+
+            async with self._write_lock:
+                for conn in self._reader_conns:
+                    await conn.close()
+                await self._writer.close()
+
+            self._reader_conns = []
+            self._readers = None
+            self._writer = None
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """O'qish uchun ulanishni vaqtincha olish"""
+        if not self.is_open:
+            await self.open()
+
+        readers = self._readers
+        conn = await readers.get()
+        try:
+            yield conn
+        finally:
+            readers.put_nowait(conn)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Yozish uchun yagona ulanishni olish (navbat bilan)"""
+        if not self.is_open:
+            await self.open()
+
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except Exception:
+                # Yarim qolgan tranzaksiyani keyingi yozuvchiga qoldirmaslik
+                await self._writer.rollback()
+                raise
+
+
+_pools: Dict[str, ConnectionPool] = {}
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Database fayli uchun umumiy pool (har bir yo'l uchun bitta)"""
+    pool = _pools.get(db_path)
+    if pool is None:
+        pool = ConnectionPool(db_path)
+        _pools[db_path] = pool
+    return pool
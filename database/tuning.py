@@ -0,0 +1,88 @@
+"""
+Database Tuning
+WAL rejimi, PRAGMA sozlamalari va davriy texnik xizmat (checkpoint/optimize/vacuum)
+"""
+import asyncio
+import aiosqlite
+
+import config
+
+
+async def configure_database(db: aiosqlite.Connection):
+    """
+    Fayl darajasidagi sozlamalar (bir marta, jadvallar yaratilishidan oldin)
+
+    WAL rejimi faylda saqlanadi: o'quvchilar yozuvchini bloklamaydi.
+    auto_vacuum=INCREMENTAL eski bazada faqat VACUUM dan keyin kuchga kiradi.
+    """
+    async with db.execute("PRAGMA auto_vacuum") as cursor:
+        auto_vacuum = (await cursor.fetchone())[0]
+
+    if auto_vacuum != 2:  # 2 = INCREMENTAL
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        async with db.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'"
+        ) as cursor:
+            has_tables = (await cursor.fetchone())[0] > 0
+        if has_tables:
+            # Mavjud bazani bir martalik qayta qurish
+            await db.execute("VACUUM")
+
+    await db.execute("PRAGMA journal_mode = WAL")
+
+
+async def apply_connection_pragmas(db: aiosqlite.Connection):
+    """Har bir ulanish uchun PRAGMA sozlamalari"""
+    await db.execute("PRAGMA synchronous = NORMAL")
+    await db.execute(f"PRAGMA busy_timeout = {int(config.DB_BUSY_TIMEOUT_MS)}")
+    await db.execute(f"PRAGMA cache_size = -{int(config.DB_CACHE_SIZE_KB)}")
+    await db.execute(f"PRAGMA mmap_size = {int(config.DB_MMAP_SIZE)}")
+    await db.execute("PRAGMA temp_store = MEMORY")
+
+
+async def run_maintenance(pool) -> bool:
+    """
+    Bir martalik texnik xizmat:
+    WAL faylini qisqartirish, eski keshni o'chirish,
+    statistikani yangilash, bo'sh sahifalarni qaytarish
+    """
+    try:
+        async with pool.writer() as db:
+            # Muddati o'tgan AI kesh yozuvlari
+            await db.execute(
+                "DELETE FROM analysis_cache WHERE created_at < datetime('now', ?)",
+                (f"-{int(config.AI_CACHE_TTL_DAYS)} days",)
+            )
+            await db.execute(
+                "DELETE FROM transcription_cache WHERE created_at < datetime('now', ?)",
+                (f"-{int(config.AI_CACHE_TTL_DAYS)} days",)
+            )
+            # Baholovchi uchun faqat oxirgi namunalar kerak
+            await db.execute(
+                "DELETE FROM token_samples WHERE id <= (SELECT MAX(id) FROM token_samples) - ?",
+                (config.TOKEN_SAMPLES_HISTORY * 5,)
+            )
+            await db.commit()
+
+            async with db.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cursor:
+                await cursor.fetchone()
+
+            await db.execute("PRAGMA optimize")
+
+            async with db.execute(
+                f"PRAGMA incremental_vacuum({int(config.DB_VACUUM_PAGES)})"
+            ) as cursor:
+                await cursor.fetchall()
+        return True
+    except Exception as e:
+        print(f"⚠️ Database texnik xizmat xato: {e}")
+        return False
+
+
+async def maintenance_loop(pool, interval: int = None):
+    """Fon vazifasi: har `interval` soniyada texnik xizmat"""
+    interval = interval or config.DB_MAINTENANCE_INTERVAL
+
+    while True:
+        await asyncio.sleep(interval)
+        await run_maintenance(pool)
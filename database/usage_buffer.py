@@ -0,0 +1,126 @@
+"""
+Usage Buffer
+AI ishlatilishini xotirada yig'ib, ai_usage jadvaliga guruhlab yozish (write-behind)
+"""
+import asyncio
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import config
+
+# (user_id, service, sana) -> tokenlar
+UsageKey = Tuple[int, str, date]
+
+
+class UsageBuffer:
+    """Yozilmagan token ishlatilishi"""
+
+    def __init__(self, pool, flush_interval: int = None, flush_events: int = None):
+        self.pool = pool
+        self.flush_interval = flush_interval or config.USAGE_FLUSH_INTERVAL
+        self.flush_events = flush_events or config.USAGE_FLUSH_EVENTS
+
+        self._pending: Dict[UsageKey, int] = {}
+        self._flushing: Dict[UsageKey, int] = {}  # Yozilayotgan (hali commit qilinmagan) guruh
+        self.flushes = 0  # Muvaffaqiyatli flush'lar soni (o'quvchilar uchun)
+        self._events = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def record(self, user_id: int, service: str, tokens: int):
+        """Ishlatilishni yozib qo'yish (DB'ga tegmaydi)"""
+        if tokens <= 0:
+            return
+
+        key = (user_id, service, date.today())
+        self._pending[key] = self._pending.get(key, 0) + tokens
+        self._events += 1
+
+        if self._events >= self.flush_events:
+            self._schedule_flush()
+
+    def pending_tokens(self, user_id: int, since: date = None) -> int:
+        """Hali yozilmagan tokenlar, yozilayotgan guruh bilan (get_monthly_tokens uchun)"""
+        return sum(
+            tokens
+            for pending in (self._pending, self._flushing)
+            for (uid, _, day), tokens in pending.items()
+            if uid == user_id and (since is None or day >= since)
+        )
+
+    def _schedule_flush(self):
+        """Fon rejimida flush (event loop ishlayotgan bo'lsa)"""
+        if self._flush_task and not self._flush_task.done():
+            return
+        try:
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+        except RuntimeError:
+            pass
+
+    async def flush(self) -> int:
+        """
+        Yig'ilgan ishlatilishni bitta tranzaksiyada yozish
+
+        Returns:
+            Yozilgan qatorlar soni
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch = self._pending
+            self._pending = {}
+            self._flushing = batch
+            self._events = 0
+
+            usage_rows = [
+                (user_id, service, tokens, day)
+                for (user_id, service, day), tokens in batch.items()
+            ]
+            user_totals: Dict[int, int] = {}
+            for (user_id, _, _), tokens in batch.items():
+                user_totals[user_id] = user_totals.get(user_id, 0) + tokens
+
+            try:
+                async with self.pool.writer() as db:
+                    await db.executemany(
+                        """INSERT INTO ai_usage (user_id, service, tokens_used, date)
+                           VALUES (?, ?, ?, ?)""",
+                        usage_rows
+                    )
+                    await db.executemany(
+                        """UPDATE users
+                           SET tokens_used = tokens_used + ?
+                           WHERE user_id = ?""",
+                        [(tokens, user_id) for user_id, tokens in user_totals.items()]
+                    )
+                    await db.commit()
+                    # Commit bilan bir vaqtda - guruh endi DB'da
+                    self._flushing = {}
+                    self.flushes += 1
+                return len(usage_rows)
+            except Exception as e:
+                print(f"❌ AI usage flush xato: {e}")
+                # Keyingi flush'da qayta urinish
+                for key, tokens in batch.items():
+                    self._pending[key] = self._pending.get(key, 0) + tokens
+                self._flushing = {}
+                return 0
+
+    async def run(self):
+        """Fon vazifasi: har `flush_interval` soniyada flush"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+_buffers: Dict[str, UsageBuffer] = {}
+
+
+def get_usage_buffer(pool) -> UsageBuffer:
+    """Pool uchun umumiy usage buffer"""
+    buffer = _buffers.get(pool.db_path)
+    if buffer is None:
+        buffer = UsageBuffer(pool)
+        _buffers[pool.db_path] = buffer
+    return buffer
@@ -10,11 +10,15 @@ from aiogram.fsm.state import State, StatesGroup
 
 from database.db import Database
 from services.ai_service import AIService
+from services.work_queue import Priority, QueueFullError, get_work_queue
+from utils.progressive import ProgressiveMessage
 from utils.subscription import SubscriptionManager
+import config
 
 router = Router()
 db = Database()
 ai_service = AIService()
+ai_queue = get_work_queue()
 sub_manager = SubscriptionManager()
 
 class DiaryStates(StatesGroup):
@@ -70,7 +74,17 @@ async def process_diary_entry(message: Message, state: FSMContext):
         if can_use:
             processing_msg = await message.answer("⏳ AI tahlil qilmoqdaman...")
             
-            analysis, tokens = await ai_service.analyze_diary(content)
+            # Javob kelishi bilan xabarda ko'rsatib borish
+            progress = ProgressiveMessage(processing_msg, prefix="🧠 <b>AI Tahlil:</b>\n")
+            on_progress = progress.update if config.AI_STREAMING else None
+            
+            try:
+                analysis, tokens = await ai_queue.submit(
+                    user_id, Priority.DIARY, lambda: ai_service.analyze_diary(content, on_progress)
+                )
+            except QueueFullError:
+                # Navbat to'lgan - kundalik AI tahlilsiz saqlanadi
+                analysis, tokens = None, 0
             
             if analysis:
                 ai_analysis = analysis
@@ -4,6 +4,7 @@ Moliyaviy operatsiyalar: ovozli xabar tahlili, statistika
 """
 import os
 from datetime import datetime, date, timedelta
+from typing import Optional, Tuple
 from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, Voice
@@ -12,12 +13,16 @@ from aiogram.fsm.state import State, StatesGroup
 
 from database.db import Database
 from services.ai_service import AIService
+from services.transcription_cache import TranscriptionCache
+from services.work_queue import Priority, QueueFullError, get_work_queue
 from utils.subscription import SubscriptionManager
 import config
 
 router = Router()
 db = Database()
 ai_service = AIService()
+ai_queue = get_work_queue()
+transcription_cache = TranscriptionCache()
 sub_manager = SubscriptionManager()
 
 class FinanceStates(StatesGroup):
@@ -38,6 +43,32 @@ async def finance_menu(message: Message):
         parse_mode="HTML"
     )
 
+async def _transcribe_voice(message: Message, user_id: int, voice: Voice) -> Tuple[Optional[str], int]:
+    """Ovoz faylini yuklab olish va matnga o'girish"""
+    file = await message.bot.get_file(voice.file_id)
+    
+    file_path = None
+    if config.VOICE_TEMP_FILES:
+        # Vaqtinchalik fayl orqali (ixtiyoriy)
+        temp_dir = "temp"
+        os.makedirs(temp_dir, exist_ok=True)
+        file_path = os.path.join(temp_dir, f"{user_id}_{datetime.now().timestamp()}.ogg")
+        await message.bot.download_file(file.file_path, file_path)
+        audio = file_path
+    else:
+        # Xotiraga yuklab olish - diskka yozilmaydi
+        buffer = await message.bot.download_file(file.file_path)
+        audio = buffer.getvalue()
+    
+    try:
+        return await ai_queue.submit(
+            user_id, Priority.TRANSACTION, lambda: ai_service.transcribe_voice(audio, duration=voice.duration)
+        )
+    finally:
+        # Faylni o'chirish
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+
 @router.message(F.voice)
 async def process_voice(message: Message):
     """Ovozli xabarni qayta ishlash"""
@@ -57,24 +88,14 @@ async def process_voice(message: Message):
     processing_msg = await message.answer("🎤 Ovozni qayta ishlamoqdaman...")
     
     try:
-        # Ovoz faylini yuklab olish
         voice: Voice = message.voice
-        file = await message.bot.get_file(voice.file_id)
-        
-        # Vaqtinchalik fayl nomi
-        temp_dir = "temp"
-        os.makedirs(temp_dir, exist_ok=True)
-        file_path = os.path.join(temp_dir, f"{user_id}_{datetime.now().timestamp()}.ogg")
-        
-        # Faylni saqlash
-        await message.bot.download_file(file.file_path, file_path)
-        
-        # Ovozni matnga o'girish
-        text, whisper_tokens = await ai_service.transcribe_voice(file_path)
         
-        # Faylni o'chirish
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Qayta yuborilgan/forward qilingan ovoz - yuklab olish va Whisper'siz
+        text = await transcription_cache.get(voice.file_unique_id, voice.duration)
+        whisper_tokens = 0
+        if text is None:
+            text, whisper_tokens = await _transcribe_voice(message, user_id, voice)
+            await transcription_cache.set(voice.file_unique_id, voice.duration, text)
         
         if not text:
             await processing_msg.edit_text("❌ Ovozni taniy olmadim. Iltimos, qaytadan urinib ko'ring.")
@@ -86,7 +107,9 @@ async def process_voice(message: Message):
         await processing_msg.edit_text(f"✅ Tanildi: <i>{text}</i>\n\n⏳ Tahlil qilmoqdaman...", parse_mode="HTML")
         
         # AI tahlil
-        analysis_list, analysis_tokens = await ai_service.analyze_transaction(text)
+        analysis_list, analysis_tokens = await ai_queue.submit(
+            user_id, Priority.TRANSACTION, lambda: ai_service.analyze_transaction(text)
+        )
         
         # DEBUG: AI tahlil natijasi
         print(f"🤖 DEBUG - AI analysis result: {analysis_list}")
@@ -99,30 +122,23 @@ async def process_voice(message: Message):
             )
             return
         
-        # Token tracking
+        # Barcha tranzaksiyalar va token tracking - bitta commit
         total_tokens = whisper_tokens + analysis_tokens
-        await db.track_ai_usage(user_id, "groq", total_tokens)
+        saved_ids = await db.add_transactions_bulk(
+            user_id, analysis_list, service="groq", tokens=total_tokens
+        )
+        if not saved_ids:
+            await db.track_ai_usage(user_id, "groq", total_tokens)
         
-        # Har bir tranzaksiyani saqlash
-        saved_count = 0
+        saved_count = len(saved_ids)
         results_text = ""
         
-        for analysis in analysis_list:
-            success = await db.add_transaction(
-                user_id=user_id,
-                trans_type=analysis.get("type", "expense"),
-                amount=float(analysis.get("amount", 0)),
-                category=analysis.get("category", "Boshqa"),
-                description=analysis.get("description", "")
+        for analysis in analysis_list[:saved_count]:
+            trans_type_emoji = "💵" if analysis["type"] == "income" else "💸"
+            results_text += (
+                f"{trans_type_emoji} {analysis.get('type', 'expense')}: "
+                f"{analysis['amount']:,} so'm - {analysis['category']}\n"
             )
-            
-            if success:
-                saved_count += 1
-                trans_type_emoji = "💵" if analysis["type"] == "income" else "💸"
-                results_text += (
-                    f"{trans_type_emoji} {analysis.get('type', 'expense')}: "
-                    f"{analysis['amount']:,} so'm - {analysis['category']}\n"
-                )
         
         if saved_count > 0:
             await processing_msg.edit_text(
@@ -134,6 +150,8 @@ async def process_voice(message: Message):
         else:
             await processing_msg.edit_text("❌ Saqlashda xatolik yuz berdi.")
     
+    except QueueFullError:
+        await processing_msg.edit_text("⏳ Hozir so'rovlar ko'p. Iltimos, birozdan keyin qayta urinib ko'ring.")
     except Exception as e:
         print(f"❌ Voice processing xato: {e}")
         await processing_msg.edit_text("❌ Xatolik yuz berdi. Iltimos, qaytadan urinib ko'ring.")
@@ -169,35 +187,30 @@ async def process_text_transaction(message: Message):
     
     try:
         # AI tahlil
-        analysis_list, tokens = await ai_service.analyze_transaction(text)
+        analysis_list, tokens = await ai_queue.submit(
+            user_id, Priority.TRANSACTION, lambda: ai_service.analyze_transaction(text)
+        )
         
         if not analysis_list:
             await processing_msg.edit_text("❌ Tahlil qilib bo'lmadi. Iltimos, aniqroq yozing.")
             return
         
-        # Token tracking
-        await db.track_ai_usage(user_id, "groq", tokens)
+        # Barcha tranzaksiyalar va token tracking - bitta commit
+        saved_ids = await db.add_transactions_bulk(
+            user_id, analysis_list, service="groq", tokens=tokens
+        )
+        if not saved_ids:
+            await db.track_ai_usage(user_id, "groq", tokens)
         
-        # Har bir tranzaksiyani saqlash
-        saved_count = 0
+        saved_count = len(saved_ids)
         results_text = ""
         
-        for analysis in analysis_list:
-            success = await db.add_transaction(
-                user_id=user_id,
-                trans_type=analysis.get("type", "expense"),
-                amount=float(analysis.get("amount", 0)),
-                category=analysis.get("category", "Boshqa"),
-                description=analysis.get("description", "")
+        for analysis in analysis_list[:saved_count]:
+            trans_type_emoji = "💵" if analysis["type"] == "income" else "💸"
+            results_text += (
+                f"{trans_type_emoji} {analysis.get('type', 'expense')}: "
+                f"{analysis['amount']:,} so'm - {analysis['category']}\n"
             )
-            
-            if success:
-                saved_count += 1
-                trans_type_emoji = "💵" if analysis["type"] == "income" else "💸"
-                results_text += (
-                    f"{trans_type_emoji} {analysis.get('type', 'expense')}: "
-                    f"{analysis['amount']:,} so'm - {analysis['category']}\n"
-                )
         
         if saved_count > 0:
             await processing_msg.edit_text(
@@ -208,6 +221,8 @@ async def process_text_transaction(message: Message):
         else:
             await processing_msg.edit_text("❌ Saqlashda xatolik yuz berdi.")
     
+    except QueueFullError:
+        await processing_msg.edit_text("⏳ Hozir so'rovlar ko'p. Iltimos, birozdan keyin qayta urinib ko'ring.")
     except Exception as e:
         print(f"❌ Text processing xato: {e}")
         await processing_msg.edit_text("❌ Xatolik yuz berdi.")
@@ -8,13 +8,17 @@ from aiogram.types import Message, CallbackQuery, FSInputFile
 
 from database.db import Database
 from services.ai_service import AIService
+from services.work_queue import Priority, QueueFullError, get_work_queue
 from services.export_service import ExportService
+from utils.progressive import ProgressiveMessage
 from utils.subscription import SubscriptionManager
 from utils.keyboards import get_report_menu, get_export_menu, get_back_button
+import config
 
 router = Router()
 db = Database()
 ai_service = AIService()
+ai_queue = get_work_queue()
 export_service = ExportService()
 sub_manager = SubscriptionManager()
 
@@ -51,46 +55,81 @@ async def weekly_report(callback: CallbackQuery):
     end_date = date.today()
     start_date = end_date - timedelta(days=7)
     
-    stats = await db.get_statistics(user_id, start_date, end_date)
+    # Joriy va o'tgan hafta - bitta so'rov bilan
+    periods = await db.get_period_statistics(user_id, {
+        "current": (start_date, end_date),
+        "previous": (start_date - timedelta(days=8), start_date - timedelta(days=1)),
+    })
+    stats = periods.get("current")
+    previous = periods.get("previous")
     
     if not stats:
         await callback.answer("Ma'lumot topilmadi", show_alert=True)
         return
     
-    # AI hisobot (agar token yetsa)
-    can_use, used, limit = await sub_manager.check_token_limit(user_id)
-    
-    ai_report = ""
-    if can_use:
-        top_category = stats["expenses_by_category"][0]["category"] if stats["expenses_by_category"] else "Yo'q"
-        
-        report_data = {
-            "total_income": stats["total_income"],
-            "total_expense": stats["total_expense"],
-            "balance": stats["balance"],
-            "top_category": top_category
-        }
-        
-        analysis, tokens = await ai_service.generate_report("weekly", report_data)
-        
-        if analysis:
-            ai_report = f"\n\n🧠 <b>AI Tahlil:</b>\n{analysis}"
-            await db.track_ai_usage(user_id, "weekly_report", tokens)
-    
     # Kategoriyalar
     categories_text = "\n".join([
         f"  • {cat['category']}: {cat['total']:,} so'm"
         for cat in stats["expenses_by_category"][:5]
     ]) if stats["expenses_by_category"] else "  Ma'lumot yo'q"
     
-    await callback.message.edit_text(
+    # O'tgan hafta bilan solishtirish
+    comparison_text = ""
+    if previous and previous["total_expense"]:
+        change = (stats["total_expense"] - previous["total_expense"]) / previous["total_expense"] * 100
+        comparison_text = f"📉 O'tgan haftaga nisbatan chiqim: {change:+.0f}%\n"
+    
+    report_text = (
         f"📅 <b>Haftalik Hisobot</b>\n"
         f"({start_date} - {end_date})\n\n"
         f"💵 Jami kirim: {stats['total_income']:,} so'm\n"
         f"💸 Jami chiqim: {stats['total_expense']:,} so'm\n"
-        f"💰 Balans: {stats['balance']:,} so'm\n\n"
+        f"💰 Balans: {stats['balance']:,} so'm\n"
+        f"{comparison_text}\n"
         f"📁 <b>Top kategoriyalar:</b>\n{categories_text}"
-        f"{ai_report}",
+    )
+    
+    top_category = stats["expenses_by_category"][0]["category"] if stats["expenses_by_category"] else "Yo'q"
+    
+    report_data = {
+        "total_income": stats["total_income"],
+        "total_expense": stats["total_expense"],
+        "balance": stats["balance"],
+        "top_category": top_category
+    }
+    period = f"{start_date}:{end_date}"
+    
+    # Ma'lumot o'zgarmagan bo'lsa - oldingi AI tahlili (token sarflanmaydi)
+    analysis = db.report_cache.get(user_id, "weekly", period, report_data)
+    
+    # AI hisobot (agar token yetsa)
+    ai_report = ""
+    if analysis:
+        ai_report = f"\n\n🧠 <b>AI Tahlil:</b>\n{analysis}"
+    elif (await sub_manager.check_token_limit(user_id))[0]:
+        # Statistika darhol, AI tahlili kelishi bilan ko'rsatiladi
+        progress = ProgressiveMessage(callback.message, prefix=report_text + "\n\n🧠 <b>AI Tahlil:</b>\n")
+        on_progress = None
+        if config.AI_STREAMING:
+            on_progress = progress.update
+            await progress.update("", force=True)
+        
+        try:
+            analysis, tokens = await ai_queue.submit(
+                user_id, Priority.REPORT,
+                lambda: ai_service.generate_report("weekly", report_data, on_progress)
+            )
+        except QueueFullError:
+            # Navbat to'lgan - hisobot AI tahlilsiz ko'rsatiladi
+            analysis, tokens = None, 0
+        
+        if analysis:
+            ai_report = f"\n\n🧠 <b>AI Tahlil:</b>\n{analysis}"
+            await db.track_ai_usage(user_id, "weekly_report", tokens)
+            db.report_cache.set(user_id, "weekly", period, report_data, analysis)
+    
+    await callback.message.edit_text(
+        f"{report_text}{ai_report}",
         parse_mode="HTML",
         reply_markup=get_back_button()
     )
@@ -118,42 +157,64 @@ async def monthly_report(callback: CallbackQuery):
         await callback.answer("Ma'lumot topilmadi", show_alert=True)
         return
     
-    # AI hisobot
-    can_use, used, limit = await sub_manager.check_token_limit(user_id)
-    
-    ai_report = ""
-    if can_use:
-        # Maqsadlar progressi
-        goals = await db.get_goals(user_id)
-        goals_progress = f"{len(goals)} ta maqsad" if goals else "Maqsad yo'q"
-        
-        report_data = {
-            "total_income": stats["total_income"],
-            "total_expense": stats["total_expense"],
-            "balance": stats["balance"],
-            "goals_progress": goals_progress
-        }
-        
-        analysis, tokens = await ai_service.generate_report("monthly", report_data)
-        
-        if analysis:
-            ai_report = f"\n\n🧠 <b>AI Tahlil:</b>\n{analysis}"
-            await db.track_ai_usage(user_id, "monthly_report", tokens)
-    
     # Kategoriyalar
     categories_text = "\n".join([
         f"  • {cat['category']}: {cat['total']:,} so'm"
         for cat in stats["expenses_by_category"][:5]
     ]) if stats["expenses_by_category"] else "  Ma'lumot yo'q"
     
-    await callback.message.edit_text(
+    report_text = (
         f"📆 <b>Oylik Hisobot</b>\n"
         f"({stats['period']['start']} - {stats['period']['end']})\n\n"
         f"💵 Jami kirim: {stats['total_income']:,} so'm\n"
         f"💸 Jami chiqim: {stats['total_expense']:,} so'm\n"
         f"💰 Balans: {stats['balance']:,} so'm\n\n"
         f"📁 <b>Top kategoriyalar:</b>\n{categories_text}"
-        f"{ai_report}",
+    )
+    
+    # Maqsadlar progressi
+    goals = await db.get_goals(user_id)
+    goals_progress = f"{len(goals)} ta maqsad" if goals else "Maqsad yo'q"
+    
+    report_data = {
+        "total_income": stats["total_income"],
+        "total_expense": stats["total_expense"],
+        "balance": stats["balance"],
+        "goals_progress": goals_progress
+    }
+    period = f"{stats['period']['start']}:{stats['period']['end']}"
+    
+    # Ma'lumot o'zgarmagan bo'lsa - oldingi AI tahlili (token sarflanmaydi)
+    analysis = db.report_cache.get(user_id, "monthly", period, report_data)
+    
+    # AI hisobot
+    ai_report = ""
+    if analysis:
+        ai_report = f"\n\n🧠 <b>AI Tahlil:</b>\n{analysis}"
+    elif (await sub_manager.check_token_limit(user_id))[0]:
+        # Statistika darhol, AI tahlili kelishi bilan ko'rsatiladi
+        progress = ProgressiveMessage(callback.message, prefix=report_text + "\n\n🧠 <b>AI Tahlil:</b>\n")
+        on_progress = None
+        if config.AI_STREAMING:
+            on_progress = progress.update
+            await progress.update("", force=True)
+        
+        try:
+            analysis, tokens = await ai_queue.submit(
+                user_id, Priority.REPORT,
+                lambda: ai_service.generate_report("monthly", report_data, on_progress)
+            )
+        except QueueFullError:
+            # Navbat to'lgan - hisobot AI tahlilsiz ko'rsatiladi
+            analysis, tokens = None, 0
+        
+        if analysis:
+            ai_report = f"\n\n🧠 <b>AI Tahlil:</b>\n{analysis}"
+            await db.track_ai_usage(user_id, "monthly_report", tokens)
+            db.report_cache.set(user_id, "monthly", period, report_data, analysis)
+    
+    await callback.message.edit_text(
+        f"{report_text}{ai_report}",
         parse_mode="HTML",
         reply_markup=get_back_button()
     )
@@ -9,6 +9,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from database.db import Database
+from services.work_queue import get_work_queue
 from utils.keyboards import get_main_menu, get_subscription_menu
 from utils.subscription import SubscriptionManager
 import config
@@ -107,6 +108,7 @@ async def cmd_admin(message: Message):
         "<b>Buyruqlar:</b>\n"
         "/stats - Batafsil statistika\n"
         "/users - Foydalanuvchilar ro'yxati\n"
+        "/rebuild_rollup - Kunlik statistikani qayta hisoblash\n"
         "/broadcast - Xabar yuborish (tez orada)\n\n"
         "📝 <b>Admin qo'shish:</b>\n"
         "config.py → ADMIN_USERS",
@@ -124,6 +126,7 @@ async def cmd_stats(message: Message):
     
     # Statistika to'plash
     stats = await db.get_admin_statistics()
+    queue = get_work_queue().stats()
     
     await message.answer(
         "📊 <b>Tizim Statistikasi</b>\n\n"
@@ -143,7 +146,13 @@ async def cmd_stats(message: Message):
         f"  • Bajarilgan: {stats['completed_goals']}\n\n"
         f"🤖 <b>AI Ishlatilishi:</b>\n"
         f"  • Groq: {stats['groq_usage']:,} token\n"
-        f"  • Gemini: {stats['gemini_usage']:,} token",
+        f"  • Gemini: {stats['gemini_usage']:,} token\n\n"
+        f"⏳ <b>AI Navbati:</b>\n"
+        f"  • Navbatda: {queue['queued']} (bajarilmoqda: {queue['in_flight']})\n"
+        f"  • Rad etilgan: {queue['rejected']}\n"
+        f"  • Kutish (p95): tranzaksiya {queue['wait']['transaction']['p95']:.1f}s, "
+        f"hisobot {queue['wait']['report']['p95']:.1f}s, "
+        f"kundalik {queue['wait']['diary']['p95']:.1f}s",
         parse_mode="HTML"
     )
 
@@ -179,6 +188,23 @@ async def cmd_users(message: Message):
     
     await message.answer(text, parse_mode="HTML")
 
+@router.message(Command("rebuild_rollup"))
+async def cmd_rebuild_rollup(message: Message):
+    """Kunlik statistika jadvalini qayta hisoblash (adminlar uchun)"""
+    user_id = message.from_user.id
+    
+    if not sub_manager.is_admin(user_id):
+        await message.answer("❌ Bu buyruq faqat adminlar uchun!")
+        return
+    
+    rows = await db.rebuild_daily_rollup()
+    
+    if rows < 0:
+        await message.answer("❌ Qayta hisoblashda xatolik yuz berdi.")
+        return
+    
+    await message.answer(f"✅ Kunlik statistika qayta hisoblandi: {rows} ta qator")
+
 @router.message(Command("token"))
 async def cmd_token(message: Message, state: FSMContext):
     """Token hisoblash buyrug'i"""
@@ -2,19 +2,78 @@
 AI Service
 Groq va Gemini bilan ishlash, avtomatik fallback
 """
-import json
-from groq import Groq
+import asyncio
+import time
+from collections import deque
+from groq import AsyncGroq, RateLimitError
+from google.api_core.exceptions import ResourceExhausted
 import google.generativeai as genai
-from typing import Optional, Dict, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Dict, List, Tuple, Union
 import config
+from services.analysis_cache import AnalysisCache
+from services.audio_processor import preprocess_audio, split_audio, stitch_transcripts
+from services.circuit_breaker import CircuitBreaker, get_breaker
+from services.local_parser import parse_transactions
+from services.micro_batcher import TransactionBatcher
+from services.prompts import Prompt, build_batch_prompt, build_prompt, prompt_messages
+from services.rate_limiter import RateScheduler, get_rate_scheduler
+from services.response_parser import parse_batch, parse_transactions as parse_response
+from utils.token_counter import estimate_request_tokens, estimate_tokens, estimator
+
+
+def _read_file(path: str) -> bytes:
+    """Faylni o'qish (thread ichida chaqiriladi)"""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _gemini_content(prompt: str) -> str:
+    """Gemini'ga yuboriladigan qism (tizim ko'rsatmasi modelda)"""
+    return prompt.user if isinstance(prompt, Prompt) and prompt.system else prompt
+
+
+async def _with_timeout(stream, timeout: float) -> AsyncIterator[Any]:
+    """Oqimning har bir bo'lagini kutish chegarasi bilan o'qish (to'xtab qolgan oqim uchun)"""
+    iterator = stream.__aiter__()
+    while True:
+        try:
+            chunk = await asyncio.wait_for(iterator.__anext__(), timeout=timeout)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(f"oqim {timeout:.0f}s davomida javob bermadi") from None
+        yield chunk
+
+
+def _retry_after(headers) -> Optional[float]:
+    """429 javobidagi retry-after sarlavhasi (soniya)"""
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate_limit_delay(error: Exception) -> Optional[float]:
+    """Rate limit xatosidagi kutish vaqti (Groq sarlavhasi, Gemini'da yo'q)"""
+    response = getattr(error, "response", None)
+    return _retry_after(response.headers) if response is not None else None
 
 class AIService:
     """AI xizmatlari bilan ishlash"""
     
-    def __init__(self):
-        # Groq clientlar
-        self.groq_client_1 = Groq(api_key=config.GROQ_API_KEY_1) if config.GROQ_API_KEY_1 else None
-        self.groq_client_2 = Groq(api_key=config.GROQ_API_KEY_2) if config.GROQ_API_KEY_2 else None
+    def __init__(
+        self,
+        scheduler: RateScheduler = None,
+        breakers: Dict[str, CircuitBreaker] = None
+    ):
+        # Groq clientlar (async - event loop bloklanmaydi)
+        # max_retries=0: 429 SDK ichida qayta yuborilmaydi - RateScheduler'ga yetib keladi
+        self.groq_client_1 = AsyncGroq(
+            api_key=config.GROQ_API_KEY_1, timeout=config.AI_REQUEST_TIMEOUT, max_retries=0
+        ) if config.GROQ_API_KEY_1 else None
+        self.groq_client_2 = AsyncGroq(
+            api_key=config.GROQ_API_KEY_2, timeout=config.AI_REQUEST_TIMEOUT, max_retries=0
+        ) if config.GROQ_API_KEY_2 else None
         
         # Gemini
         if config.GEMINI_API_KEY:
@@ -22,199 +81,604 @@ class AIService:
             self.gemini_model = genai.GenerativeModel(config.GEMINI_MODEL)
         else:
             self.gemini_model = None
+        self._gemini_models = {}  # Tizim ko'rsatmasi -> model
         
         self.current_groq = 1  # Qaysi Groq ishlatilayotgani
+        
+        # Muvaffaqiyatli javoblar kechikishi (hedging uchun, soniya)
+        self._latencies = deque(maxlen=200)
+        
+        # Provayderlar holati (circuit breaker) - handlerlar orasida umumiy
+        self.breakers = breakers or {
+            name: get_breaker(name) for name in ("groq_1", "groq_2", "gemini")
+        }
+        
+        # Kalitlar bo'yicha RPM/TPM byudjeti - kalit limiti jarayon bo'yicha bitta
+        self.scheduler = scheduler or get_rate_scheduler()
+        
+        # Takrorlanuvchi matnlar uchun natijalar keshi
+        self.analysis_cache = AnalysisCache()
+        
+        # Bir vaqtda kelgan tranzaksiya matnlarini birlashtirish (ixtiyoriy)
+        self.batcher = TransactionBatcher(self) if config.AI_BATCHING else None
+        
+        # Haqiqiy token sarfi namunalari (baholovchini kalibrlash uchun, to'plab yoziladi)
+        self._token_samples = []
+        self._db = None
+    
+    @property
+    def db(self):
+        """Token namunalarini saqlash uchun Database (kerak bo'lganda yaratiladi)"""
+        if self._db is None:
+            from database.db import Database
+            self._db = Database()
+        return self._db
+    
+    async def _record_usage(
+        self,
+        provider: str,
+        prompt: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        audio_seconds: float = 0.0
+    ):
+        """Provayder qaytargan haqiqiy sarfni baholovchiga va tarixga yozish"""
+        if prompt:
+            estimator.observe(prompt, prompt_tokens, completion_tokens)
+        self._token_samples.append((
+            provider, len(prompt or ""), len((prompt or "").split()),
+            prompt_tokens, completion_tokens, audio_seconds
+        ))
+        if len(self._token_samples) >= config.TOKEN_SAMPLES_BATCH:
+            samples, self._token_samples = self._token_samples, []
+            await self.db.add_token_samples(samples)
     
-    async def transcribe_voice(self, audio_file_path: str) -> Tuple[Optional[str], int]:
+    async def transcribe_voice(
+        self,
+        audio: Union[bytes, str],
+        filename: str = "voice.ogg",
+        duration: float = 0
+    ) -> Tuple[Optional[str], int]:
         """
         Ovozni matnga o'girish (Groq Whisper)
+        audio - ovoz baytlari yoki fayl yo'li, duration - davomiylik (soniya)
+        Uzun yozuvlar bo'laklarga ajratilib, kalitlar bo'yicha parallel o'giriladi
         Returns: (matn, ishlatilgan_tokenlar)
         """
         try:
-            # Groq 1 bilan urinish
-            if self.groq_client_1:
-                try:
-                    with open(audio_file_path, "rb") as audio_file:
-                        transcription = self.groq_client_1.audio.transcriptions.create(
-                            file=(audio_file_path, audio_file.read()),
-                            model=config.GROQ_WHISPER_MODEL,
-                            language="uz"  # O'zbek tili
-                        )
-                    return transcription.text, 1000  # Taxminiy token
-                except Exception as e:
-                    print(f"⚠️ Groq 1 Whisper xato: {e}")
+            if isinstance(audio, str):
+                # Fayl yo'li: bir marta, event loop'dan tashqarida o'qish
+                filename = audio
+                audio_bytes = await asyncio.to_thread(_read_file, audio)
+            else:
+                audio_bytes = bytes(audio)
             
-            # Groq 2 bilan urinish
-            if self.groq_client_2:
-                try:
-                    with open(audio_file_path, "rb") as audio_file:
-                        transcription = self.groq_client_2.audio.transcriptions.create(
-                            file=(audio_file_path, audio_file.read()),
-                            model=config.GROQ_WHISPER_MODEL,
-                            language="uz"
-                        )
-                    return transcription.text, 1000
-                except Exception as e:
-                    print(f"⚠️ Groq 2 Whisper xato: {e}")
+            # Jimlikni kesish, 16 kHz mono (fayl yoki xotira - ikkala yo'lda ham)
+            audio_bytes = await preprocess_audio(audio_bytes)
+            chunks = await split_audio(audio_bytes, duration)
+            if len(chunks) == 1:
+                text, seconds = await self._whisper(chunks[0], filename)
+                if not text:
+                    return None, 0
+                return text, await self._whisper_tokens([seconds or duration])
             
-            return None, 0
+            # Har bir bo'lak boshqa kalitdan boshlaydi - kalitlar teng yuklanadi
+            results = await asyncio.gather(*[
+                self._whisper(chunk, f"chunk_{i}.ogg", first=i) for i, chunk in enumerate(chunks)
+            ])
+            
+            # Xato bergan bo'lakni boshqa kalitdan qayta so'rash
+            for i, (text, _) in enumerate(results):
+                if text is None:
+                    results[i] = await self._whisper(chunks[i], f"chunk_{i}.ogg", first=i + 1)
+            
+            if any(text is None for text, _ in results):
+                # Bo'lak baribir o'girilmadi - butun yozuv bitta so'rov bilan
+                text, seconds = await self._whisper(audio_bytes, filename)
+                if not text:
+                    return None, 0
+                done = [chunk_seconds for chunk_text, chunk_seconds in results if chunk_text is not None]
+                return text, await self._whisper_tokens(done + [seconds or duration])
+            
+            # Bo'sh bo'laklar (faqat pauza) tashlab ketiladi
+            text = stitch_transcripts([text for text, _ in results if text.strip()])
+            if not text:
+                return None, 0
+            return text, await self._whisper_tokens([seconds for _, seconds in results])
         
         except Exception as e:
             print(f"❌ Whisper xato: {e}")
             return None, 0
     
+    async def _whisper_tokens(self, durations: List[float]) -> int:
+        """
+        Whisper sarfi: audio soniyalari (har bir so'rov kamida WHISPER_MIN_BILLED_SECONDS)
+        tokenga aylantiriladi - foydalanuvchi limiti bitta birlikda yuritiladi
+        """
+        seconds = sum(max(d or 0.0, config.WHISPER_MIN_BILLED_SECONDS) for d in durations)
+        await self._record_usage("whisper", "", 0, 0, audio_seconds=seconds)
+        return int(seconds * config.WHISPER_TOKENS_PER_SECOND)
+    
+    async def _whisper(
+        self, audio_bytes: bytes, filename: str, first: int = 0
+    ) -> Tuple[Optional[str], float]:
+        """
+        Bitta Whisper so'rovi: `first` - qaysi kalitdan boshlash
+        Returns: (matn, audio_soniyalar - provayder qaytargan davomiylik)
+        """
+        clients = [("groq_1", self.groq_client_1), ("groq_2", self.groq_client_2)]
+        clients = clients[first % 2:] + clients[:first % 2]
+        
+        for name, client in clients:
+            breaker = self.breakers[name]
+            if not client or not breaker.available() or not breaker.try_begin():
+                continue
+            
+            started = time.monotonic()
+            try:
+                transcription = await client.audio.transcriptions.create(
+                    file=(filename, audio_bytes),
+                    model=config.GROQ_WHISPER_MODEL,
+                    language="uz",  # O'zbek tili
+                    response_format="verbose_json"  # duration maydoni uchun
+                )
+                breaker.record_success(time.monotonic() - started)
+                return transcription.text, float(getattr(transcription, "duration", 0) or 0)
+            except asyncio.CancelledError:
+                breaker.cancel()
+                raise
+            except RateLimitError as e:
+                breaker.cancel()
+                self.scheduler.rate_limited(name, _rate_limit_delay(e))
+            except Exception as e:
+                breaker.record_failure()
+                print(f"⚠️ {name} Whisper xato: {e}")
+        
+        return None, 0.0
+    
     async def analyze_transaction(self, text: str) -> Tuple[Optional[list], int]:
         """
         Moliyaviy matnni tahlil qilish (bir yoki bir nechta tranzaksiya)
         Returns: (tranzaksiyalar_ro'yxati, ishlatilgan_tokenlar)
         """
-        prompt = config.TRANSACTION_ANALYSIS_PROMPT.format(text=text)
+        # Oddiy matnlar lokal tahlil qilinadi (AI'siz)
+        if config.LOCAL_PARSER_ENABLED:
+            local, confidence = parse_transactions(text)
+            if local and confidence >= config.LOCAL_PARSER_MIN_CONFIDENCE:
+                return local, 0
         
-        # Groq 1 bilan urinish
-        result, tokens = await self._call_groq(prompt, self.groq_client_1)
-        if result:
-            parsed = self._parse_json_response(result)
-            # Agar array bo'lmasa, array qilib qaytarish
-            if parsed and not isinstance(parsed, list):
-                parsed = [parsed]
-            return parsed, tokens
-        
-        # Groq 2 bilan urinish
-        result, tokens = await self._call_groq(prompt, self.groq_client_2)
-        if result:
-            parsed = self._parse_json_response(result)
-            if parsed and not isinstance(parsed, list):
-                parsed = [parsed]
-            return parsed, tokens
+        # Keshda bo'lsa - AI chaqirilmaydi, token sarflanmaydi
+        cached = await self.analysis_cache.get(text)
+        if cached:
+            return cached, 0
         
-        # Gemini bilan urinish
-        result, tokens = await self._call_gemini(prompt)
-        if result:
-            parsed = self._parse_json_response(result)
-            if parsed and not isinstance(parsed, list):
-                parsed = [parsed]
-            return parsed, tokens
+        if self.batcher:
+            parsed, tokens = await self.batcher.submit(text)
+        else:
+            parsed, tokens = await self._analyze_single(text)
         
-        return None, 0
+        if parsed:
+            await self.analysis_cache.set(text, parsed)
+        return parsed, tokens
     
-    async def analyze_diary(self, text: str) -> Tuple[Optional[str], int]:
+    async def _analyze_single(self, text: str) -> Tuple[Optional[list], int]:
+        """Bitta matn uchun AI so'rovi"""
+        prompt = build_prompt("transaction", json_mode=config.AI_JSON_MODE, text=text)
+        return await self._hedged_call(
+            prompt, parse=parse_response, json_mode=config.AI_JSON_MODE
+        )
+    
+    async def _analyze_batch(self, texts: List[str]) -> Tuple[List[Optional[list]], int]:
+        """
+        Bir nechta matn - bitta raqamlangan so'rov
+        Returns: (har bir matn uchun natija yoki None, jami_tokenlar)
+        """
+        def parse(result: str) -> Optional[List[Optional[list]]]:
+            items = parse_batch(result, len(texts))
+            return items if any(items) else None
+        
+        results, tokens = await self._hedged_call(
+            build_batch_prompt(texts), parse=parse, json_mode=config.AI_JSON_MODE
+        )
+        return results or [None] * len(texts), tokens
+    
+    async def analyze_diary(
+        self,
+        text: str,
+        on_progress: Callable[[str], Awaitable[None]] = None
+    ) -> Tuple[Optional[str], int]:
         """
         Kundalik tahlili
+        on_progress berilsa - javob oqim (stream) bilan olinadi va qismlab uzatiladi
         Returns: (tahlil, ishlatilgan_tokenlar)
         """
-        prompt = config.DIARY_ANALYSIS_PROMPT.format(text=text)
+        prompt = build_prompt("diary", text=text)
+        if on_progress:
+            return await self._streamed_call(prompt, on_progress)
+        return await self._hedged_call(prompt)
+    
+    async def generate_report(
+        self,
+        report_type: str,
+        data: Dict,
+        on_progress: Callable[[str], Awaitable[None]] = None
+    ) -> Tuple[Optional[str], int]:
+        """
+        Hisobot yaratish
+        on_progress berilsa - javob oqim (stream) bilan olinadi va qismlab uzatiladi
+        Returns: (hisobot, ishlatilgan_tokenlar)
+        """
+        if report_type not in ("weekly", "monthly"):
+            return None, 0
+        prompt = build_prompt(report_type, **data)
         
-        # Groq 1
-        result, tokens = await self._call_groq(prompt, self.groq_client_1)
-        if result:
-            return result, tokens
+        if on_progress:
+            return await self._streamed_call(prompt, on_progress)
+        return await self._hedged_call(prompt)
+    
+    async def stream_completion(self, prompt: str, usage: Dict = None) -> AsyncIterator[str]:
+        """
+        Javobni oqim bilan olish: matn bo'laklarini (delta) qaytaradi
+        Provayder birinchi bo'lakdan oldin xato bersa - keyingisiga o'tiladi.
+        usage lug'atiga yoziladi: provider, tokens, complete (javob oxirigacha keldimi)
+        """
+        usage = usage if usage is not None else {}
+        usage["complete"] = False
+        est_tokens = estimate_request_tokens(prompt)
+        sources = {
+            "groq_1": lambda: self._stream_groq(prompt, self.groq_client_1, usage),
+            "groq_2": lambda: self._stream_groq(prompt, self.groq_client_2, usage),
+            "gemini": lambda: self._stream_gemini(prompt, usage),
+        }
         
-        # Groq 2
-        result, tokens = await self._call_groq(prompt, self.groq_client_2)
-        if result:
-            return result, tokens
+        for name, _ in self._providers(est_tokens):
+            breaker = self.breakers[name]
+            # Sinov so'rovi (half-open) byudjet kutilishidan oldin band qilinadi
+            if not breaker.try_begin():
+                continue
+            try:
+                acquired = await self.scheduler.acquire(name, est_tokens)
+            except asyncio.CancelledError:
+                breaker.cancel()
+                raise
+            if not acquired:
+                breaker.cancel()
+                continue
+            
+            started = time.monotonic()
+            usage["provider"] = name
+            yielded = False
+            try:
+                async for delta in sources[name]():
+                    yielded = True
+                    yield delta
+            except (asyncio.CancelledError, GeneratorExit):
+                breaker.cancel()
+                raise
+            except (RateLimitError, ResourceExhausted) as e:
+                breaker.cancel()
+                self.scheduler.rate_limited(name, _rate_limit_delay(e))
+                if yielded:
+                    return
+                continue
+            except Exception as e:
+                breaker.record_failure()
+                print(f"⚠️ {name} stream xato: {e}")
+                if yielded:
+                    return  # Qisman javob - complete=False
+                continue
+            
+            if not yielded:
+                breaker.record_failure()
+                continue
+            
+            breaker.record_success(time.monotonic() - started)
+            self.scheduler.settle(name, est_tokens, usage.get("tokens", 0))
+            if usage.get("tokens"):
+                await self._record_usage(
+                    name, prompt, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+                )
+            usage["complete"] = True
+            return
+    
+    async def _streamed_call(
+        self,
+        prompt: str,
+        on_progress: Callable[[str], Awaitable[None]]
+    ) -> Tuple[Optional[str], int]:
+        """
+        Oqim bilan chaqirish: har bir bo'lakdan keyin to'plangan matn on_progress'ga beriladi
+        Oqim uzilib qolsa - oddiy (hedged) chaqiruvga qaytiladi
+        """
+        usage = {}
+        parts = []
+        async for delta in self.stream_completion(prompt, usage):
+            parts.append(delta)
+            await on_progress("".join(parts))
         
-        # Gemini
-        result, tokens = await self._call_gemini(prompt)
-        if result:
-            return result, tokens
+        text = "".join(parts).strip()
+        if not (usage.get("complete") and text):
+            return await self._hedged_call(prompt)
+        
+        tokens = usage.get("tokens") or estimate_tokens(prompt) + estimate_tokens(text)
+        return text, tokens
+    
+    async def _stream_groq(self, prompt: str, client: Optional[AsyncGroq], usage: Dict) -> AsyncIterator[str]:
+        """Groq javobini oqim bilan olish"""
+        if not client:
+            return
         
-        return None, 0
+        stream = await client.chat.completions.create(
+            model=config.GROQ_MODEL,
+            messages=prompt_messages(prompt),
+            temperature=0.7,
+            max_tokens=1000,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # Token sarfi oxirgi bo'lakda keladi
+            chunk_usage = chunk.usage or (chunk.x_groq.usage if chunk.x_groq else None)
+            if chunk_usage:
+                usage["prompt_tokens"] = chunk_usage.prompt_tokens
+                usage["completion_tokens"] = chunk_usage.completion_tokens
+                usage["tokens"] = chunk_usage.total_tokens
     
-    async def generate_report(self, report_type: str, data: Dict) -> Tuple[Optional[str], int]:
+    async def _stream_gemini(self, prompt: str, usage: Dict) -> AsyncIterator[str]:
+        """Gemini javobini oqim bilan olish"""
+        if not self.gemini_model:
+            return
+        
+        response = await asyncio.wait_for(
+            self._gemini_for(prompt).generate_content_async(_gemini_content(prompt), stream=True),
+            timeout=config.AI_REQUEST_TIMEOUT
+        )
+        # Groq'da HTTP timeout bor, Gemini oqimi esa bo'laklar orasida cheklanmagan
+        async for chunk in _with_timeout(response, config.AI_REQUEST_TIMEOUT):
+            if chunk.text:
+                yield chunk.text
+            metadata = getattr(chunk, "usage_metadata", None)
+            if metadata and metadata.total_token_count:
+                usage["prompt_tokens"] = metadata.prompt_token_count
+                usage["completion_tokens"] = metadata.candidates_token_count
+                usage["tokens"] = metadata.total_token_count
+    
+    def _providers(
+        self, est_tokens: int = 0, json_mode: bool = False
+    ) -> List[Tuple[str, Callable[[str], Awaitable[Tuple[Optional[str], int]]]]]:
         """
-        Hisobot yaratish
-        Returns: (hisobot, ishlatilgan_tokenlar)
+        Fallback tartibidagi provayderlar:
+        o'chirilgan (open) provayderlar tashlab ketiladi, qolganlari sog'liq bahosi bo'yicha.
+        Byudjeti tugagan kalitlar oxiriga, byudjeti ko'proq qolgan kalit oldinga o'tadi.
         """
-        if report_type == "weekly":
-            prompt = config.WEEKLY_REPORT_PROMPT.format(**data)
-        elif report_type == "monthly":
-            prompt = config.MONTHLY_REPORT_PROMPT.format(**data)
-        else:
+        providers = []
+        if self.groq_client_1:
+            providers.append(("groq_1", lambda prompt: self._call_groq(
+                prompt, self.groq_client_1, "groq_1", json_mode
+            )))
+        if self.groq_client_2:
+            providers.append(("groq_2", lambda prompt: self._call_groq(
+                prompt, self.groq_client_2, "groq_2", json_mode
+            )))
+        if self.gemini_model:
+            providers.append(("gemini", lambda prompt: self._call_gemini(prompt, json_mode)))
+        
+        available = [p for p in providers if self.breakers[p[0]].available()]
+        if not available:
+            # Hammasi o'chirilgan - oxirgi chora sifatida statik tartibda
+            return providers
+        
+        # Ma'lumoti yo'q provayder o'rtacha baho oladi (statik tartib saqlanadi)
+        known = [self.breakers[name].latency for name, _ in available]
+        known = [latency for latency in known if latency is not None]
+        default_latency = sum(known) / len(known) if known else 0.0
+        
+        def rank(provider):
+            name = provider[0]
+            headroom = max(self.scheduler.headroom(name), 0.05)
+            return (
+                not self.scheduler.has_capacity(name, est_tokens),
+                self.breakers[name].score(default_latency) / headroom,
+            )
+        
+        return sorted(available, key=rank)
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """
+        Keyingi provayderni parallel ishga tushirishdan oldin kutish vaqti
+        Oxirgi muvaffaqiyatli javoblarning p95 kechikishi (yetarli ma'lumot bo'lmasa - config)
+        """
+        if not config.AI_HEDGE_ENABLED:
+            return None
+        
+        if len(self._latencies) < config.AI_HEDGE_MIN_SAMPLES:
+            return config.AI_HEDGE_DELAY
+        
+        ordered = sorted(self._latencies)
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        return min(max(p95, config.AI_HEDGE_MIN_DELAY), config.AI_HEDGE_DELAY)
+    
+    async def _timed_call(self, name: str, call, prompt: str) -> Tuple[Optional[str], int]:
+        """Provayderni chaqirish, kechikish va holatni yozib borish"""
+        breaker = self.breakers[name]
+        est_tokens = estimate_request_tokens(prompt)
+        # Half-open'da faqat bitta sinov: band qilish byudjet kutilishidan oldin
+        if not breaker.try_begin():
+            return None, 0
+        try:
+            acquired = await self.scheduler.acquire(name, est_tokens)
+        except asyncio.CancelledError:
+            breaker.cancel()
+            raise
+        if not acquired:
+            # Kalit byudjeti tugagan - xato hisoblanmaydi, keyingi provayderga o'tiladi
+            breaker.cancel()
             return None, 0
         
-        # Groq 1
-        result, tokens = await self._call_groq(prompt, self.groq_client_1)
-        if result:
-            return result, tokens
+        started = time.monotonic()
+        try:
+            result, tokens = await call(prompt)
+        except asyncio.CancelledError:
+            breaker.cancel()
+            raise
+        except (RateLimitError, ResourceExhausted) as e:
+            # 429 - byudjet masalasi, provayder nosozligi emas (breaker'ga yozilmaydi)
+            breaker.cancel()
+            self.scheduler.rate_limited(name, _rate_limit_delay(e))
+            return None, 0
         
-        # Groq 2
-        result, tokens = await self._call_groq(prompt, self.groq_client_2)
+        self.scheduler.settle(name, est_tokens, tokens)
         if result:
-            return result, tokens
+            latency = time.monotonic() - started
+            self._latencies.append(latency)
+            breaker.record_success(latency)
+        else:
+            breaker.record_failure()
+        return result, tokens
+    
+    async def _hedged_call(
+        self,
+        prompt: str,
+        parse: Callable[[str], Any] = None,
+        json_mode: bool = False
+    ) -> Tuple[Optional[Any], int]:
+        """
+        Provayderlarni hedging bilan chaqirish:
+        birinchisi `hedge_delay` ichida javob bermasa, keyingisi parallel ishga tushadi,
+        xato bo'lsa - darhol keyingisi. Birinchi yaroqli javob olinadi, qolganlari bekor qilinadi.
+        """
+        providers = self._providers(estimate_request_tokens(prompt), json_mode)
+        if not providers:
+            return None, 0
         
-        # Gemini
-        result, tokens = await self._call_gemini(prompt)
-        if result:
-            return result, tokens
+        delay = self._hedge_delay()
+        pending = set()
+        next_index = 0
         
-        return None, 0
+        def launch():
+            nonlocal next_index
+            name, call = providers[next_index]
+            next_index += 1
+            pending.add(asyncio.create_task(self._timed_call(name, call, prompt)))
+        
+        launch()
+        try:
+            while pending:
+                can_hedge = next_index < len(providers)
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    # Javob kechikdi - keyingi provayderni parallel ishga tushirish
+                    launch()
+                    continue
+                
+                for task in done:
+                    pending.discard(task)
+                    result, tokens = task.result()
+                    if not result:
+                        continue
+                    value = parse(result) if parse else result
+                    if value:
+                        return value, tokens
+                
+                # Xato yoki yaroqsiz javob - keyingisiga o'tish
+                if next_index < len(providers):
+                    launch()
+            
+            return None, 0
+        finally:
+            for task in pending:
+                task.cancel()
     
-    async def _call_groq(self, prompt: str, client: Optional[Groq]) -> Tuple[Optional[str], int]:
-        """Groq API chaqirish"""
+    async def _call_groq(
+        self,
+        prompt: str,
+        client: Optional[AsyncGroq],
+        name: str = "groq_1",
+        json_mode: bool = False
+    ) -> Tuple[Optional[str], int]:
+        """Groq API chaqirish (json_mode - javob faqat JSON obyekt)"""
         if not client:
             return None, 0
         
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
         try:
-            response = client.chat.completions.create(
+            raw = await client.chat.completions.with_raw_response.create(
                 model=config.GROQ_MODEL,
-                messages=[{"role": "user", "content": prompt}],
+                messages=prompt_messages(prompt),
                 temperature=0.7,
-                max_tokens=1000
+                max_tokens=1000,
+                **extra
             )
+            # x-ratelimit-* sarlavhalari - kalitning haqiqiy qoldig'i
+            self.scheduler.update_from_headers(name, raw.headers)
+            response = await raw.parse()
             
             text = response.choices[0].message.content
-            tokens = response.usage.total_tokens if hasattr(response, 'usage') else 500
+            tokens = await self._usage_tokens(name, prompt, text, getattr(response, "usage", None))
             
             return text, tokens
         
+        except RateLimitError:
+            raise  # _timed_call RateScheduler'ga xabar beradi
         except Exception as e:
             print(f"⚠️ Groq API xato: {e}")
             return None, 0
     
-    async def _call_gemini(self, prompt: str) -> Tuple[Optional[str], int]:
-        """Gemini API chaqirish"""
+    async def _call_gemini(self, prompt: str, json_mode: bool = False) -> Tuple[Optional[str], int]:
+        """Gemini API chaqirish (json_mode - javob faqat JSON)"""
         if not self.gemini_model:
             return None, 0
         
+        generation_config = {"response_mime_type": "application/json"} if json_mode else None
         try:
-            response = self.gemini_model.generate_content(prompt)
+            response = await asyncio.wait_for(
+                self._gemini_for(prompt).generate_content_async(
+                    _gemini_content(prompt), generation_config=generation_config
+                ),
+                timeout=config.AI_REQUEST_TIMEOUT
+            )
             text = response.text
-            tokens = 500  # Taxminiy
+            tokens = await self._usage_tokens("gemini", prompt, text, getattr(response, "usage_metadata", None))
             
             return text, tokens
         
+        except ResourceExhausted:
+            raise  # _timed_call RateScheduler'ga xabar beradi
         except Exception as e:
             print(f"⚠️ Gemini API xato: {e}")
             return None, 0
     
-    def _parse_json_response(self, text: str) -> Optional[Dict]:
-        """JSON javobni parse qilish"""
-        try:
-            # Agar matnda ```json``` bo'lsa, uni olib tashlash
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0].strip()
-            
-            return json.loads(text)
-        except Exception as e:
-            print(f"⚠️ JSON parse xato: {e}")
-            # Oddiy regex bilan parse qilishga urinish
-            try:
-                import re
-                amount_match = re.search(r'"amount":\s*(\d+)', text)
-                type_match = re.search(r'"type":\s*"(\w+)"', text)
-                category_match = re.search(r'"category":\s*"([^"]+)"', text)
-                
-                if amount_match and type_match:
-                    return {
-                        "amount": int(amount_match.group(1)),
-                        "type": type_match.group(1),
-                        "category": category_match.group(1) if category_match else "Boshqa",
-                        "description": ""
-                    }
-            except:
-                pass
-            
-            return None
+    def _gemini_for(self, prompt: str):
+        """Tizim ko'rsatmasi bilan Gemini modeli (har bir ko'rsatma uchun bitta)"""
+        system = prompt.system if isinstance(prompt, Prompt) else ""
+        if not system:
+            return self.gemini_model
+        model = self._gemini_models.get(system)
+        if model is None:
+            model = genai.GenerativeModel(config.GEMINI_MODEL, system_instruction=system)
+            self._gemini_models[system] = model
+        return model
+    
+    async def _usage_tokens(self, name: str, prompt: str, text: str, usage) -> int:
+        """
+        Javobdagi haqiqiy token soni (Groq `usage` / Gemini `usage_metadata`)
+        Provayder qaytarmasa - baholovchi bo'yicha
+        """
+        if usage is not None:
+            prompt_tokens = getattr(usage, "prompt_tokens", None)
+            if prompt_tokens is None:
+                prompt_tokens = getattr(usage, "prompt_token_count", 0)
+            completion_tokens = getattr(usage, "completion_tokens", None)
+            if completion_tokens is None:
+                completion_tokens = getattr(usage, "candidates_token_count", 0)
+            if prompt_tokens or completion_tokens:
+                await self._record_usage(name, prompt, prompt_tokens or 0, completion_tokens or 0)
+                return (prompt_tokens or 0) + (completion_tokens or 0)
+        
+        return estimate_tokens(prompt) + estimate_tokens(text or "")
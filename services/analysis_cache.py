@@ -0,0 +1,71 @@
+"""
+Analysis Cache
+Takrorlanuvchi matnlar uchun tranzaksiya tahlili keshi (xotira + ixtiyoriy SQLite)
+"""
+import copy
+import re
+from typing import Optional
+
+import config
+from utils.cache import LRUCache
+
+# Apostrof variantlari: to'rt / to`rt / to‘rt / toʻrt -> tort
+_APOSTROPHES = re.compile(r"[\'`‘’ʻʼ´]")
+# Raqam guruhlari orasidagi bo'shliq/nuqta: "15 000" / "15.000" -> "15000"
+_DIGIT_GROUPS = re.compile(r"(?<=\d)[\s.,](?=\d{3}\b)")
+_DECIMAL_COMMA = re.compile(r"(?<=\d),(?=\d)")
+# Kasr nuqtasidan boshqa tinish belgilari
+_PUNCTUATION = re.compile(r"(?!(?<=\d)\.(?=\d))[^\w\s+*-]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Kesh kaliti uchun matnni normallashtirish"""
+    text = text.lower()
+    text = _APOSTROPHES.sub("", text)
+    text = _DIGIT_GROUPS.sub("", text)
+    text = _DECIMAL_COMMA.sub(".", text)
+    text = _PUNCTUATION.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class AnalysisCache:
+    """analyze_transaction natijalari keshi"""
+
+    def __init__(self, maxsize: int = None, persist: bool = None):
+        self.memory = LRUCache(maxsize or config.AI_CACHE_SIZE)
+        self.persist = config.AI_CACHE_PERSIST if persist is None else persist
+        self._db = None
+
+    @property
+    def db(self):
+        """SQLite keshi uchun Database (kerak bo'lganda yaratiladi)"""
+        if self._db is None:
+            from database.db import Database
+            self._db = Database()
+        return self._db
+
+    async def get(self, text: str) -> Optional[list]:
+        """Keshdan natija (nusxa) olish"""
+        key = normalize_text(text)
+        if not key:
+            return None
+
+        result = self.memory.get(key)
+        if result is None and self.persist:
+            result = await self.db.get_cached_analysis(key, config.AI_CACHE_TTL_DAYS)
+            if result is not None:
+                self.memory.set(key, result)
+
+        return copy.deepcopy(result) if result is not None else None
+
+    async def set(self, text: str, result: list):
+        """Natijani saqlash"""
+        key = normalize_text(text)
+        if not key or not result:
+            return
+
+        result = copy.deepcopy(result)
+        self.memory.set(key, result)
+        if self.persist:
+            await self.db.save_cached_analysis(key, result)
@@ -0,0 +1,193 @@
+"""
+Audio Processor
+Whisper'dan oldin ovozni tayyorlash (ffmpeg orqali, ixtiyoriy):
+boshi/oxiridagi jimlikni kesish, 16 kHz mono, ixcham Opus
+"""
+import asyncio
+import re
+import shutil
+from typing import List, Optional, Tuple
+
+import config
+
+# Boshidagi jimlik kesiladi, teskari aylantirib - oxiridagisi ham
+_TRIM_FILTER = (
+    "silenceremove=start_periods=1:start_threshold={threshold}dB:start_silence=0.2,"
+    "areverse,"
+    "silenceremove=start_periods=1:start_threshold={threshold}dB:start_silence=0.2,"
+    "areverse"
+)
+_SILENCE_START = re.compile(r"silence_start: (-?\d+(?:\.\d+)?)")
+_SILENCE_END = re.compile(r"silence_end: (\d+(?:\.\d+)?)")
+# Progress qatori: "time=00:00:41.52" (oxirgisi - dekodlangan davomiylik)
+_DECODED_TIME = re.compile(r"time=(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(config.FFMPEG_PATH) is not None
+
+
+async def _run_ffmpeg(args: list, audio: bytes, want_stderr: bool = False):
+    """
+    ffmpeg'ni stdin/stdout orqali ishga tushirish (diskka yozilmaydi)
+    Returns: stdout (want_stderr bo'lsa - stderr matni), xato bo'lsa None
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            config.FFMPEG_PATH, "-hide_banner",
+            # silencedetect natijalari info darajasida yoziladi
+            "-loglevel", "info" if want_stderr else "error", *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(audio), timeout=config.AI_REQUEST_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        process.kill()
+        print("⚠️ ffmpeg vaqti tugadi")
+        return None
+    except Exception as e:
+        print(f"⚠️ ffmpeg xato: {e}")
+        return None
+
+    if process.returncode != 0:
+        print(f"⚠️ ffmpeg xato: {stderr.decode(errors='ignore').strip()}")
+        return None
+    return stderr.decode(errors="ignore") if want_stderr else stdout
+
+
+def _opus_args(bitrate: str) -> list:
+    return ["-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", bitrate,
+            "-application", "voip", "-f", "ogg", "pipe:1"]
+
+
+async def preprocess_audio(audio: bytes) -> bytes:
+    """
+    Ovozni Whisper uchun tayyorlash
+    Xato bo'lsa yoki ffmpeg yo'q bo'lsa - asl baytlar qaytariladi
+    """
+    if not config.AUDIO_PREPROCESS or not audio or not ffmpeg_available():
+        return audio
+
+    processed = await _run_ffmpeg([
+        "-i", "pipe:0",
+        "-af", _TRIM_FILTER.format(threshold=config.AUDIO_SILENCE_THRESHOLD_DB),
+        *_opus_args(config.AUDIO_BITRATE),
+    ], audio)
+
+    # Butunlay jim yozuv yoki kattalashgan natija - asl faylni yuborish
+    if not processed or len(processed) >= len(audio):
+        return audio
+    return processed
+
+
+def _decoded_duration(log: str) -> Optional[float]:
+    times = _DECODED_TIME.findall(log)
+    if not times:
+        return None
+    hours, minutes, seconds = times[-1]
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+async def detect_silences(audio: bytes) -> Tuple[List[Tuple[float, float]], Optional[float]]:
+    """
+    Jimlik oraliqlari va yozuvning haqiqiy davomiyligi (ffmpeg dekodlagan)
+    Returns: ([(boshlanish, tugash), ...], davomiylik) - soniyada
+    """
+    log = await _run_ffmpeg([
+        "-i", "pipe:0",
+        "-af", f"silencedetect=noise={config.AUDIO_SILENCE_THRESHOLD_DB}dB:d={config.AUDIO_CHUNK_MIN_SILENCE}",
+        "-f", "null", "-",
+    ], audio, want_stderr=True)
+    if not log:
+        return [], None
+
+    starts = [max(0.0, float(v)) for v in _SILENCE_START.findall(log)]
+    ends = [float(v) for v in _SILENCE_END.findall(log)]
+    return list(zip(starts, ends)), _decoded_duration(log)
+
+
+def plan_chunks(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    target: float = None,
+    overlap: float = None
+) -> List[Tuple[float, float]]:
+    """
+    Yozuvni bo'laklarga ajratish rejasi: [(boshlanish, tugash), ...]
+    Kesish nuqtasi - `target` uzunlikka eng yaqin jimlik o'rtasi (topilmasa - aynan `target`).
+    Har bir bo'lak oldingisi bilan `overlap` soniya ustma-ust tushadi (so'z kesilib qolmasligi uchun).
+    """
+    target = target or config.AUDIO_CHUNK_SECONDS
+    overlap = config.AUDIO_CHUNK_OVERLAP if overlap is None else overlap
+    if duration <= target * 1.5:
+        return [(0.0, duration)]
+
+    cut_points = [(start + end) / 2 for start, end in silences]
+    chunks = []
+    start = 0.0
+    while duration - start > target * 1.5:
+        ideal = start + target
+        # Ideal nuqtadan yarim bo'lak atrofidagi eng yaqin jimlik
+        candidates = [c for c in cut_points if abs(c - ideal) <= target / 2 and c > start + overlap]
+        cut = min(candidates, key=lambda c: abs(c - ideal)) if candidates else ideal
+        chunks.append((max(0.0, start - overlap), cut))
+        start = cut
+    chunks.append((max(0.0, start - overlap), duration))
+    return chunks
+
+
+async def split_audio(audio: bytes, duration: float) -> List[bytes]:
+    """
+    Uzun yozuvni jimliklar bo'yicha bo'laklarga ajratish
+    Bo'lish kerak bo'lmasa yoki ffmpeg ishlamasa - [audio]
+    """
+    if not audio or duration <= config.AUDIO_CHUNK_SECONDS * 1.5 or not ffmpeg_available():
+        return [audio]
+
+    # Oldindan tayyorlangan (jimligi kesilgan) bayt Telegram davomiyligidan qisqa -
+    # kesish nuqtalari ffmpeg hisoblagan davomiylik bo'yicha
+    silences, decoded = await detect_silences(audio)
+    plan = plan_chunks(decoded or duration, silences)
+    if len(plan) == 1:
+        return [audio]
+
+    parts = await asyncio.gather(*[
+        _run_ffmpeg([
+            "-i", "pipe:0",
+            "-ss", f"{start:.2f}",
+            "-t", f"{end - start:.2f}",
+            *_opus_args(config.AUDIO_BITRATE),
+        ], audio)
+        for start, end in plan
+    ])
+    if not all(parts):
+        return [audio]
+    return list(parts)
+
+
+def _normalize_words(words: List[str]) -> List[str]:
+    return [re.sub(r"[^\w]", "", word.lower()) for word in words]
+
+
+def stitch_transcripts(texts: List[str], max_overlap_words: int = 12) -> str:
+    """
+    Bo'laklar matnini tartib bo'yicha birlashtirish
+    Ustma-ust qismdagi takrorlangan so'zlar (oldingi oxiri = keyingi boshi) olib tashlanadi
+    """
+    result: List[str] = []
+    for text in texts:
+        words = (text or "").split()
+        if not words:
+            continue
+        if result:
+            previous = _normalize_words(result[-max_overlap_words:])
+            current = _normalize_words(words[:max_overlap_words])
+            for size in range(min(len(previous), len(current)), 0, -1):
+                if previous[-size:] == current[:size]:
+                    words = words[size:]
+                    break
+        result.extend(words)
+    return " ".join(result)
@@ -0,0 +1,152 @@
+"""
+Circuit Breaker
+AI provayderlar holati: closed / open / half-open va sog'liq bahosi
+"""
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import config
+
+
+class CircuitState:
+    CLOSED = "closed"        # Normal ishlayapti
+    OPEN = "open"            # Ishlamayapti - so'rov yuborilmaydi
+    HALF_OPEN = "half_open"  # Sinov so'rovi yuborilmoqda
+
+
+class CircuitBreaker:
+    """Bitta provayder uchun circuit breaker"""
+
+    def __init__(
+        self,
+        name: str,
+        window: float = None,
+        min_requests: int = None,
+        error_rate: float = None,
+        consecutive_failures: int = None,
+        cooldown: float = None
+    ):
+        self.name = name
+        self.window = window or config.AI_BREAKER_WINDOW
+        self.min_requests = min_requests or config.AI_BREAKER_MIN_REQUESTS
+        self.error_rate_threshold = error_rate or config.AI_BREAKER_ERROR_RATE
+        self.consecutive_limit = consecutive_failures or config.AI_BREAKER_CONSECUTIVE_FAILURES
+        self.cooldown = cooldown or config.AI_BREAKER_COOLDOWN
+
+        self.state = CircuitState.CLOSED
+        self._events = deque()  # (vaqt, muvaffaqiyatli, kechikish)
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def _trim(self, now: float):
+        """Oynadan tashqaridagi eski hodisalarni olib tashlash"""
+        while self._events and self._events[0][0] < now - self.window:
+            self._events.popleft()
+
+    @property
+    def error_rate(self) -> float:
+        """Oynadagi xatolar ulushi"""
+        self._trim(time.monotonic())
+        if not self._events:
+            return 0.0
+        failures = sum(1 for _, ok, _ in self._events if not ok)
+        return failures / len(self._events)
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Oynadagi muvaffaqiyatli javoblarning o'rtacha kechikishi"""
+        self._trim(time.monotonic())
+        latencies = [latency for _, ok, latency in self._events if ok]
+        if not latencies:
+            return None
+        return sum(latencies) / len(latencies)
+
+    def available(self) -> bool:
+        """Hozir so'rov yuborish mumkinmi (holatni o'zgartirmaydi)"""
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.state == CircuitState.OPEN:
+            return time.monotonic() - self._opened_at >= self.cooldown
+        # Half-open: bir vaqtda faqat bitta sinov so'rovi
+        return not self._probe_in_flight
+
+    def try_begin(self) -> bool:
+        """
+        So'rov yuborilishidan oldin (open -> half-open o'tishi)
+        Half-open'da sinov so'rovi tekshiruv bilan bir vaqtda band qilinadi:
+        boshqa sinov allaqachon ketgan bo'lsa - False
+        """
+        if self.state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self.state = CircuitState.HALF_OPEN
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def cancel(self):
+        """So'rov bekor qilindi (hedging yutqazgan) - natija hisobga olinmaydi"""
+        if self.state == CircuitState.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_success(self, latency: float):
+        """Muvaffaqiyatli javob"""
+        now = time.monotonic()
+        self._events.append((now, True, latency))
+        self._trim(now)
+        self._consecutive_failures = 0
+
+        if self.state != CircuitState.CLOSED:
+            print(f"✅ {self.name} qayta ishlayapti")
+            self.state = CircuitState.CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """Xato javob"""
+        now = time.monotonic()
+        self._events.append((now, False, 0.0))
+        self._trim(now)
+        self._consecutive_failures += 1
+
+        if self.state == CircuitState.HALF_OPEN:
+            self._open(now)
+            return
+
+        too_many_errors = (
+            len(self._events) >= self.min_requests
+            and self.error_rate >= self.error_rate_threshold
+        )
+        if self._consecutive_failures >= self.consecutive_limit or too_many_errors:
+            self._open(now)
+
+    def _open(self, now: float):
+        """Provayderni vaqtincha o'chirish"""
+        if self.state != CircuitState.OPEN:
+            print(f"⚠️ {self.name} vaqtincha o'chirildi ({self.cooldown:.0f}s)")
+        self.state = CircuitState.OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+
+    def score(self, default_latency: float = 0.0) -> float:
+        """Sog'liq bahosi (kichik - yaxshi): kechikish xatolar ulushi bilan jarimalangan"""
+        latency = self.latency
+        if latency is None:
+            latency = default_latency
+        error_rate = self.error_rate
+        # Har bir xato taxminan hedge kutishicha vaqt yo'qotadi
+        return latency * (1 + 4 * error_rate) + error_rate * config.AI_HEDGE_DELAY
+
+
+# Provayder nomi -> breaker (barcha AIService nusxalari uchun umumiy)
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Provayder uchun umumiy circuit breaker"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(name)
+        _breakers[name] = breaker
+    return breaker
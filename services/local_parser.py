@@ -0,0 +1,260 @@
+"""
+Local Transaction Parser
+Oddiy o'zbekcha matnlarni AI'siz tahlil qilish: summa, tur va kategoriya
+("taxi 15000", "non uchun besh ming so'm", "maosh oldim ikki yarim million")
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+import config
+from services.analysis_cache import normalize_text
+
+# So'z bilan yozilgan sonlar
+UNITS = {
+    "bir": 1, "ikki": 2, "uch": 3, "tort": 4, "besh": 5,
+    "olti": 6, "yetti": 7, "sakkiz": 8, "toqqiz": 9,
+    "on": 10, "yigirma": 20, "ottiz": 30, "qirq": 40, "ellik": 50,
+    "oltmish": 60, "yetmish": 70, "sakson": 80, "toqson": 90,
+}
+HUNDRED = "yuz"
+SCALES = {
+    "k": 1_000, "ming": 1_000,
+    "mln": 1_000_000, "million": 1_000_000,
+    "mlrd": 1_000_000_000, "milliard": 1_000_000_000,
+}
+HALF = "yarim"
+
+CURRENCY_WORDS = {"som", "sum", "somga", "sumga", "somlik", "uzs"}
+# Chet el valyutasi: so'mga aylantirib bo'lmaydi - AI'ga qoldiriladi
+FOREIGN_CURRENCY_WORDS = {"dollar", "usd", "rubl", "euro", "yevro", "evro", "eur", "rub"}
+_FOREIGN_CURRENCY_SIGNS = re.compile(r"[$€₽]")
+# Miqdor so'zlari: "2 ta non 5000" - summa noaniq, AI'ga qoldiriladi
+QUANTITY_WORDS = {"ta", "dona", "kg", "kilo", "litr", "gramm", "metr"}
+
+# Raqam + qo'shimcha: "15k", "2.5mln", "15000som"
+_NUMBER_TOKEN = re.compile(r"^(\d+(?:\.\d+)?)(k|ming|mln|million|mlrd|milliard)?(som|sum|ga)?$")
+# Bir nechta tranzaksiyani ajratish (kasr vergulidan tashqari)
+_SEGMENT_SPLIT = re.compile(r"(?<!\d),|,(?!\d)|;|\n|\bva\b|\bhamda\b", re.IGNORECASE)
+
+# So'z qo'shimchalari: taksiga, nonga, dorilar, maoshim
+SUFFIXES = ("", "ga", "ka", "ni", "da", "dan", "lar", "larga", "im", "imga", "ing", "ning", "i", "si")
+
+EXPENSE_KEYWORDS: Dict[str, List[str]] = {
+    "Oziq-ovqat": [
+        "non", "ovqat", "tushlik", "nonushta", "kechki", "gosht", "sut", "meva",
+        "sabzavot", "bozor", "market", "supermarket", "kafe", "restoran", "choy",
+        "qahva", "kofe", "shashlik", "osh", "lavash", "pizza", "burger", "somsa",
+        "produkt", "oziq", "yegulik", "shirinlik",
+    ],
+    "Transport": [
+        "taxi", "taksi", "avtobus", "metro", "benzin", "yoqilgi", "yandex",
+        "propan", "metan", "parkovka", "yolkira", "marshrutka", "poyezd", "avia",
+    ],
+    "Uy-joy": [
+        "ijara", "kvartira", "kommunal", "svet", "elektr", "gaz", "remont",
+        "tamir", "mebel",
+    ],
+    "Sog'liq": [
+        "dori", "apteka", "dorixona", "shifokor", "doktor", "klinika",
+        "kasalxona", "stomatolog", "tish", "analiz",
+    ],
+    "Ta'lim": [
+        "kurs", "kitob", "talim", "maktab", "universitet", "kontrakt",
+        "repetitor", "dars",
+    ],
+    "O'yin-kulgi": [
+        "kino", "oyin", "konsert", "sayohat", "netflix", "spotify", "teatr",
+    ],
+    "Kiyim": [
+        "kiyim", "koylak", "shim", "krossovka", "poyabzal", "kurtka",
+        "futbolka", "tufli", "palto",
+    ],
+    "Aloqa": [
+        "telefon", "internet", "aloqa", "paynet", "mobil", "uzmobile",
+        "beeline", "ucell", "mobiuz",
+    ],
+}
+
+INCOME_KEYWORDS: Dict[str, List[str]] = {
+    "Maosh": ["maosh", "oylik", "zarplata", "avans", "bonus", "premiya"],
+    "Biznes": ["biznes", "savdo", "foyda", "daromad", "sotdim", "mijoz", "buyurtma"],
+    "Sovg'a": ["sovga", "hadya", "tuhfa"],
+    "Investitsiya": ["investitsiya", "dividend", "foiz", "aksiya", "depozit"],
+}
+
+INCOME_VERBS = {"tushdi", "keldi", "topdim", "ishlab"}
+EXPENSE_VERBS = {"sarfladim", "sarf", "toladim", "tolandi", "xarid", "ketdi", "berdim"}
+
+
+def _strip_emoji(category: str) -> str:
+    """'🚗 Transport' -> 'Transport'"""
+    return category.split(" ", 1)[-1]
+
+
+# Kategoriya nomlari config'dagi ro'yxatlar bilan bir xil bo'lishi kerak
+_EXPENSE_NAMES = {_strip_emoji(c) for c in config.EXPENSE_CATEGORIES}
+_INCOME_NAMES = {_strip_emoji(c) for c in config.INCOME_CATEGORIES}
+
+
+def _build_index(keywords: Dict[str, List[str]], allowed: set) -> Dict[str, Tuple[str, str]]:
+    """So'z shakli -> (kategoriya, asosiy so'z)"""
+    index = {}
+    for category, words in keywords.items():
+        if category not in allowed:
+            continue
+        for word in words:
+            key = normalize_text(word)
+            for suffix in SUFFIXES:
+                index.setdefault(key + suffix, (category, key))
+    return index
+
+
+_EXPENSE_INDEX = _build_index(EXPENSE_KEYWORDS, _EXPENSE_NAMES)
+_INCOME_INDEX = _build_index(INCOME_KEYWORDS, _INCOME_NAMES)
+_FOREIGN_CURRENCY = {word + suffix for word in FOREIGN_CURRENCY_WORDS for suffix in SUFFIXES}
+
+
+def _is_number_word(token: str) -> bool:
+    return (
+        token in UNITS or token == HUNDRED or token in SCALES or token == HALF
+        or bool(_NUMBER_TOKEN.match(token))
+    )
+
+
+def parse_amount(tokens: List[str]) -> Optional[float]:
+    """
+    Sonli ifodani hisoblash:
+    ["ikki", "yarim", "million"] -> 2500000, ["15", "ming"] -> 15000, ["15k"] -> 15000
+    """
+    total = 0.0
+    current = 0.0
+    seen = False
+
+    for token in tokens:
+        match = _NUMBER_TOKEN.match(token)
+        if match:
+            current += float(match.group(1))
+            if match.group(2):
+                total += current * SCALES[match.group(2)]
+                current = 0.0
+            seen = True
+        elif token in UNITS:
+            current += UNITS[token]
+            seen = True
+        elif token == HUNDRED:
+            current = (current or 1) * 100
+            seen = True
+        elif token == HALF:
+            current += 0.5
+            seen = True
+        elif token in SCALES:
+            total += (current or 1) * SCALES[token]
+            current = 0.0
+            seen = True
+        else:
+            return None
+
+    if not seen:
+        return None
+    return total + current
+
+
+def _parse_segment(segment: str) -> Tuple[Optional[Dict], float]:
+    """Bitta tranzaksiya: (natija, ishonch 0..1)"""
+    tokens = normalize_text(segment).split()
+    if not tokens or _FOREIGN_CURRENCY_SIGNS.search(segment):
+        return None, 0.0
+
+    # Sonli ifodalarni topish (ketma-ket son so'zlari)
+    phrases = []
+    current = []
+    words = []
+    for token in tokens:
+        if _is_number_word(token):
+            current.append(token)
+            continue
+        if current:
+            phrases.append((current, token))
+            current = []
+        words.append(token)
+    if current:
+        phrases.append((current, None))
+
+    # "bir", "on" kabi so'zlar ba'zan son emas - bitta aniq summa bo'lishi kerak
+    if len(phrases) != 1:
+        return None, 0.0
+    number_tokens, next_word = phrases[0]
+    if next_word in QUANTITY_WORDS:
+        return None, 0.0
+
+    if _FOREIGN_CURRENCY & set(words):
+        return None, 0.0
+
+    amount = parse_amount(number_tokens)
+    if not amount or amount < 100:
+        return None, 0.0
+
+    # Kategoriya va tur: barcha so'zlar ko'rib chiqiladi
+    income = [_INCOME_INDEX[w] for w in words if w in _INCOME_INDEX]
+    expense = [_EXPENSE_INDEX[w] for w in words if w in _EXPENSE_INDEX]
+    has_income = bool(income or INCOME_VERBS & set(words))
+    has_expense = bool(expense or EXPENSE_VERBS & set(words))
+
+    # Qarama-qarshi belgilar ("telefon sotdim", "oylik ijara") - AI hal qiladi
+    if has_income and has_expense:
+        return None, 0.0
+
+    confidence = 1.0
+    keyword = None
+    if income:
+        trans_type = "income"
+        category, keyword = income[0]
+    elif expense:
+        trans_type = "expense"
+        category, keyword = expense[0]
+    elif has_income or has_expense:
+        trans_type = "income" if has_income else "expense"
+        category = "Boshqa"
+        confidence = 0.6
+    else:
+        return None, 0.0
+
+    description_words = [
+        w for w in words
+        if w not in CURRENCY_WORDS and w not in INCOME_VERBS and w not in EXPENSE_VERBS
+        and w not in ("uchun", "bugun", "kecha", "oldim")
+    ]
+    description = (keyword or " ".join(description_words[:3])).capitalize()
+
+    return {
+        "type": trans_type,
+        "amount": int(amount) if amount == int(amount) else amount,
+        "category": category,
+        "description": description,
+    }, confidence
+
+
+def parse_transactions(text: str) -> Tuple[Optional[list], float]:
+    """
+    Matndan tranzaksiyalarni lokal ajratish
+
+    Returns:
+        (tranzaksiyalar_ro'yxati, ishonch) - ishonch past bo'lsa AI ishlatilishi kerak
+    """
+    if not text or len(text) > config.LOCAL_PARSER_MAX_LENGTH:
+        return None, 0.0
+
+    results = []
+    confidence = 1.0
+    for segment in _SEGMENT_SPLIT.split(text):
+        if not segment.strip():
+            continue
+        parsed, segment_confidence = _parse_segment(segment)
+        if parsed is None:
+            return None, 0.0
+        results.append(parsed)
+        confidence = min(confidence, segment_confidence)
+
+    if not results:
+        return None, 0.0
+    return results, confidence
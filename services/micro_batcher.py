@@ -0,0 +1,86 @@
+"""
+Micro Batcher
+Bir vaqtda kelgan tranzaksiya matnlarini (turli foydalanuvchilardan) qisqa oynada yig'ib,
+bitta raqamlangan AI so'roviga birlashtirish; natijalar har bir kutayotgan chaqiruvchiga qaytariladi
+"""
+import asyncio
+from typing import List, Optional, Tuple
+
+import config
+
+
+class TransactionBatcher:
+    """analyze_transaction so'rovlarini birlashtiruvchi"""
+
+    def __init__(self, service, window_ms: int = None, max_size: int = None):
+        self.service = service  # AIService: _analyze_single / _analyze_batch
+        self.window = (window_ms or config.AI_BATCH_WINDOW_MS) / 1000
+        self.max_size = max_size or config.AI_BATCH_MAX_SIZE
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def submit(self, text: str) -> Tuple[Optional[list], int]:
+        """Matnni navbatdagi guruhga qo'shish va natijani kutish"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Yig'ilgan guruhni yuborish"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        if len(batch) == 1:
+            await self._single(*batch[0])
+            return
+
+        texts = [text for text, _ in batch]
+        try:
+            results, tokens = await self.service._analyze_batch(texts)
+        except Exception as e:
+            print(f"⚠️ Batch tahlil xato: {e}")
+            results, tokens = [None] * len(batch), 0
+
+        # Tokenlar matn uzunligiga mutanosib taqsimlanadi
+        total_length = sum(len(text) for text in texts) or 1
+        fallback = []
+        for (text, future), parsed in zip(batch, results):
+            if future.done():
+                continue
+            if parsed:
+                future.set_result((parsed, round(tokens * len(text) / total_length)))
+            else:
+                fallback.append((text, future))
+
+        # Guruhda tahlil qilinmagan matnlar - alohida so'rov bilan
+        if fallback:
+            await asyncio.gather(*[self._single(text, future) for text, future in fallback])
+
+    async def _single(self, text: str, future: asyncio.Future):
+        try:
+            result = await self.service._analyze_single(text)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
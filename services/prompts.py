@@ -0,0 +1,81 @@
+"""
+Prompt Builder
+Shablonlardan prompt yaratish: o'zgarmas tizim ko'rsatmasi alohida,
+so'rov ma'lumoti alohida (provayderlarning prompt keshi ishlashi uchun)
+"""
+import json
+from typing import Dict, List, Tuple
+
+import config
+
+
+class Prompt(str):
+    """
+    Tizim ko'rsatmasi + foydalanuvchi qismi
+    str sifatida - to'liq matn (token baholash, kesh kalitlari uchun)
+    """
+
+    def __new__(cls, system: str, user: str):
+        prompt = super().__new__(cls, f"{system}\n\n{user}" if system else user)
+        prompt.system = system
+        prompt.user = user
+        return prompt
+
+
+# Tur -> versiya -> (tizim ko'rsatmasi, so'rov shabloni)
+TEMPLATES: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "transaction": {
+        "v1": ("", config.TRANSACTION_ANALYSIS_PROMPT),
+        "v2": (config.TRANSACTION_SYSTEM_PROMPT, config.TRANSACTION_USER_TEMPLATE),
+    },
+    "diary": {
+        "v1": ("", config.DIARY_ANALYSIS_PROMPT),
+        "v2": (config.DIARY_SYSTEM_PROMPT, config.DIARY_USER_TEMPLATE),
+    },
+    "weekly": {
+        "v1": ("", config.WEEKLY_REPORT_PROMPT),
+        "v2": (config.WEEKLY_REPORT_SYSTEM_PROMPT, config.WEEKLY_REPORT_USER_TEMPLATE),
+    },
+    "monthly": {
+        "v1": ("", config.MONTHLY_REPORT_PROMPT),
+        "v2": (config.MONTHLY_REPORT_SYSTEM_PROMPT, config.MONTHLY_REPORT_USER_TEMPLATE),
+    },
+}
+
+
+def build_prompt(kind: str, version: str = None, json_mode: bool = False, **data) -> Prompt:
+    """
+    Prompt yaratish
+    Raises: KeyError - noma'lum tur
+    """
+    versions = TEMPLATES[kind]
+    system, template = versions.get(version or config.PROMPT_VERSION) or versions["v1"]
+    user = template.format(**data)
+
+    if json_mode:
+        # JSON mode'da javob obyekt bo'lishi kerak
+        if system:
+            system += config.TRANSACTION_JSON_MODE_SUFFIX
+        else:
+            user += config.TRANSACTION_JSON_MODE_SUFFIX
+    return Prompt(system, user)
+
+
+def build_batch_prompt(texts: List[str]) -> Prompt:
+    """
+    Bir nechta foydalanuvchi matni uchun bitta raqamlangan prompt (javob doim JSON obyekt)
+    Matnlar JSON obyekt sifatida beriladi - ko'p qatorli matn keyingi raqamli matnga qo'shilib ketmaydi
+    """
+    system = config.TRANSACTION_SYSTEM_PROMPT + config.TRANSACTION_BATCH_SUFFIX
+    user = json.dumps({str(i): text for i, text in enumerate(texts, 1)}, ensure_ascii=False)
+    return Prompt(system, user)
+
+
+def prompt_messages(prompt: str) -> List[Dict[str, str]]:
+    """Chat API uchun xabarlar: tizim ko'rsatmasi birinchi (keshlanadigan prefiks)"""
+    if isinstance(prompt, Prompt) and prompt.system:
+        return [
+            {"role": "system", "content": prompt.system},
+            {"role": "user", "content": prompt.user},
+        ]
+    return [{"role": "user", "content": prompt}]
@@ -0,0 +1,177 @@
+"""
+Rate Scheduler
+Har bir API kalit uchun so'rov (RPM) va token (TPM) byudjeti - token bucket
+"""
+import asyncio
+import re
+import time
+from typing import Dict, Mapping, Optional
+
+import config
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Groq reset sarlavhasi: '2m59.56s' / '7.66s' / '120ms' -> soniya"""
+    if not value:
+        return None
+    seconds = 0.0
+    for number, unit in _DURATION_PART.findall(value):
+        number = float(number)
+        seconds += {"ms": number / 1000, "s": number, "m": number * 60, "h": number * 3600}[unit]
+    return seconds
+
+
+class TokenBucket:
+    """Daqiqalik limit uchun token bucket"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0  # Soniyada to'ladi
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @property
+    def fraction(self) -> float:
+        """Qolgan byudjet ulushi (0..1)"""
+        self._refill()
+        return max(0.0, self.tokens) / self.capacity if self.capacity else 0.0
+
+    def wait_time(self, amount: float) -> float:
+        """`amount` mavjud bo'lishi uchun kutish vaqti (soniya)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate else float("inf")
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+    def set_remaining(self, remaining: float):
+        """Provayder sarlavhalaridan haqiqiy qoldiqni o'rnatish"""
+        self._refill()
+        self.tokens = min(self.capacity, float(remaining))
+
+
+class KeyBudget:
+    """Bitta API kalit: so'rovlar va tokenlar byudjeti"""
+
+    def __init__(self, name: str, rpm: int, tpm: int):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0  # 429 dan keyin
+
+    def headroom(self) -> float:
+        """Eng tor byudjet ulushi (0..1)"""
+        if time.monotonic() < self.blocked_until:
+            return 0.0
+        return min(self.requests.fraction, self.tokens.fraction)
+
+    def wait_time(self, est_tokens: int) -> float:
+        """So'rov yuborish uchun kutish vaqti"""
+        blocked = max(0.0, self.blocked_until - time.monotonic())
+        return max(blocked, self.requests.wait_time(1), self.tokens.wait_time(est_tokens))
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """x-ratelimit-* sarlavhalaridan byudjetni yangilash"""
+        try:
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if remaining is None:
+                    continue
+                bucket.set_remaining(float(remaining))
+                reset = parse_reset(headers.get(f"x-ratelimit-reset-{kind}"))
+                if float(remaining) <= 0 and reset:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + reset)
+        except (TypeError, ValueError):
+            pass
+
+    def rate_limited(self, retry_after: Optional[float] = None):
+        """429 javobi: kalitni vaqtincha bloklash"""
+        delay = retry_after if retry_after else config.AI_RATE_LIMIT_BACKOFF
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+
+class RateScheduler:
+    """Kalitlar bo'yicha byudjetni kuzatish va navbat"""
+
+    def __init__(self):
+        self.budgets: Dict[str, KeyBudget] = {
+            "groq_1": KeyBudget("groq_1", config.GROQ_RPM, config.GROQ_TPM),
+            "groq_2": KeyBudget("groq_2", config.GROQ_RPM, config.GROQ_TPM),
+            "gemini": KeyBudget("gemini", config.GEMINI_RPM, config.GEMINI_TPM),
+        }
+
+    def headroom(self, name: str) -> float:
+        budget = self.budgets.get(name)
+        return budget.headroom() if budget else 1.0
+
+    def has_capacity(self, name: str, est_tokens: int) -> bool:
+        budget = self.budgets.get(name)
+        return budget is None or budget.wait_time(est_tokens) == 0.0
+
+    async def acquire(self, name: str, est_tokens: int, max_wait: float = None) -> bool:
+        """
+        Byudjetdan joy olish; yetmasa `max_wait` gacha navbatda kutish
+
+        Returns:
+            True - so'rov yuborish mumkin, False - bu kalit hozir band
+        """
+        budget = self.budgets.get(name)
+        if budget is None:
+            return True
+
+        max_wait = config.AI_RATE_MAX_WAIT if max_wait is None else max_wait
+        wait = budget.wait_time(est_tokens)
+        if wait > max_wait:
+            return False
+
+        # Avval band qilish, keyin kutish: parallel kutayotganlar qoldiqni manfiyga
+        # tushiradi va har biri o'z navbatini (kattaroq kutish) oladi
+        budget.requests.consume(1)
+        budget.tokens.consume(est_tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                budget.requests.consume(-1)
+                budget.tokens.consume(-est_tokens)
+                raise
+        return True
+
+    def settle(self, name: str, est_tokens: int, actual_tokens: int):
+        """Haqiqiy token sarfini hisobga olish (taxmin bilan farq)"""
+        budget = self.budgets.get(name)
+        if budget and actual_tokens:
+            budget.tokens.consume(actual_tokens - est_tokens)
+
+    def update_from_headers(self, name: str, headers: Mapping[str, str]):
+        budget = self.budgets.get(name)
+        if budget and headers:
+            budget.update_from_headers(headers)
+
+    def rate_limited(self, name: str, retry_after: Optional[float] = None):
+        budget = self.budgets.get(name)
+        if budget:
+            print(f"⚠️ {name} rate limit - {retry_after or config.AI_RATE_LIMIT_BACKOFF:.0f}s kutiladi")
+            budget.rate_limited(retry_after)
+
+
+_scheduler: Optional[RateScheduler] = None
+
+
+def get_rate_scheduler() -> RateScheduler:
+    """Barcha AIService nusxalari uchun umumiy byudjet (kalit limiti jarayon bo'yicha bitta)"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RateScheduler()
+    return _scheduler
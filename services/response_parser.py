@@ -0,0 +1,198 @@
+"""
+Response Parser
+AI javobidan JSON'ni bir o'tishda ajratish va tranzaksiya sxemasi bo'yicha tekshirish
+(qisman buzilgan javoblardan ham yaroqli elementlar tiklanadi)
+"""
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+
+_decoder = json.JSONDecoder()
+
+# Obyekt ichida tranzaksiyalar ro'yxati bo'lishi mumkin bo'lgan kalitlar (JSON mode)
+LIST_KEYS = ("transactions", "items", "data", "result")
+
+
+def _category_names(categories: List[str]) -> Dict[str, str]:
+    """'🚗 Transport' -> {'transport': 'Transport'}"""
+    names = {}
+    for category in categories:
+        name = category.split(" ", 1)[-1]
+        names[name.lower()] = name
+    return names
+
+
+TRANSACTION_SCHEMA = {
+    "type": {"enum": {"expense": "expense", "income": "income", "chiqim": "expense", "kirim": "income"}},
+    "amount": {"number": True, "minimum": 0, "exclusive": True},
+    "category": {
+        "by_type": {
+            "expense": _category_names(config.EXPENSE_CATEGORIES),
+            "income": _category_names(config.INCOME_CATEGORIES),
+        },
+        "default": "Boshqa",
+    },
+    "description": {"string": True, "max_length": 200, "default": ""},
+}
+
+_AMOUNT_NOISE = re.compile(r"[\s,_']|so['`‘’]?m|sum|uzs", re.IGNORECASE)
+# Kasr verguli: "2,5" -> "2.5" (minglik ajratuvchi "1,500,000" - 3 raqam)
+_DECIMAL_COMMA = re.compile(r"(?<=\d),(?=\d{1,2}(?!\d))")
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(_AMOUNT_NOISE.sub("", _DECIMAL_COMMA.sub(".", value)))
+        except ValueError:
+            return None
+    return None
+
+
+def compile_schema(schema: Dict[str, Dict]) -> Callable[[Any], Optional[Dict]]:
+    """
+    Sxemani bir marta tekshiruvchi funksiyaga aylantirish
+    Funksiya: element -> tozalangan dict yoki None (yaroqsiz bo'lsa)
+    """
+    type_values = schema["type"]["enum"]
+    amount_rule = schema["amount"]
+    category_rule = schema["category"]
+    description_rule = schema["description"]
+
+    def validate(item: Any) -> Optional[Dict]:
+        if not isinstance(item, dict):
+            return None
+
+        trans_type = type_values.get(str(item.get("type", "")).strip().lower())
+        if trans_type is None:
+            return None
+
+        amount = _to_number(item.get("amount"))
+        if amount is None or amount < amount_rule["minimum"]:
+            return None
+        if amount_rule["exclusive"] and amount == amount_rule["minimum"]:
+            return None
+        if amount == int(amount):
+            amount = int(amount)
+
+        allowed = category_rule["by_type"][trans_type]
+        category = str(item.get("category") or "").strip()
+        # Emoji bilan kelgan bo'lsa ham: "🚗 Transport" -> "Transport"
+        category = allowed.get(category.lower()) or allowed.get(category.split(" ", 1)[-1].lower())
+
+        description = item.get("description")
+        if not isinstance(description, str):
+            description = description_rule["default"] if description is None else str(description)
+
+        return {
+            "type": trans_type,
+            "amount": amount,
+            "category": category or category_rule["default"],
+            "description": description.strip()[:description_rule["max_length"]],
+        }
+
+    return validate
+
+
+validate_transaction = compile_schema(TRANSACTION_SCHEMA)
+
+
+def _recover_array(text: str, start: int) -> List[Any]:
+    """
+    Buzilgan array: `[` dan keyingi har bir `{...}` ni alohida o'qish,
+    o'qib bo'lmagan qismlarni keyingi `{` gacha o'tkazib yuborish
+    """
+    items = []
+    position = start + 1
+    length = len(text)
+    while position < length:
+        position = text.find("{", position)
+        if position == -1:
+            break
+        try:
+            value, end = _decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            position += 1
+            continue
+        items.append(value)
+        position = end
+        # Array tugadi (keyingi muhim belgi `]`)
+        while position < length and text[position] in " \t\r\n,":
+            position += 1
+        if position < length and text[position] == "]":
+            break
+    return items
+
+
+def extract_json(text: str) -> Optional[Any]:
+    """
+    Matndagi birinchi JSON qiymatini olish (kod bloklari, izohlar e'tiborga olinmaydi)
+    Array buzilgan bo'lsa - undagi yaroqli obyektlar ro'yxati qaytariladi
+    """
+    if not text:
+        return None
+
+    position = 0
+    length = len(text)
+    while position < length:
+        # Keyingi '[' yoki '{'
+        brackets = [i for i in (text.find("[", position), text.find("{", position)) if i != -1]
+        if not brackets:
+            return None
+        position = min(brackets)
+        try:
+            value, _ = _decoder.raw_decode(text, position)
+            return value
+        except json.JSONDecodeError:
+            if text[position] == "[":
+                items = _recover_array(text, position)
+                if items:
+                    return items
+        position += 1
+    return None
+
+
+def _validate_items(value: Any) -> Optional[List[Dict]]:
+    """Array (yoki bitta obyekt) -> tekshirilgan tranzaksiyalar"""
+    if isinstance(value, dict):
+        for key in LIST_KEYS:
+            if isinstance(value.get(key), list):
+                value = value[key]
+                break
+        else:
+            value = [value]
+    if not isinstance(value, list):
+        return None
+
+    transactions = [t for t in (validate_transaction(item) for item in value) if t]
+    return transactions or None
+
+
+def parse_transactions(text: str) -> Optional[List[Dict]]:
+    """AI javobidan tekshirilgan tranzaksiyalar ro'yxati (yaroqlilari bo'lmasa - None)"""
+    return _validate_items(extract_json(text))
+
+
+def parse_batch(text: str, count: int) -> List[Optional[List[Dict]]]:
+    """
+    Raqamlangan ko'p matnli javobni ajratish: {"results": {"1": [...], "2": [...]}}
+    (yoki array'lar ro'yxati). Har bir matn uchun natija, topilmaganlari - None
+    """
+    value = extract_json(text)
+    if isinstance(value, dict) and "results" in value:
+        value = value["results"]
+
+    if isinstance(value, dict):
+        items = [value.get(str(i + 1), value.get(i + 1)) for i in range(count)]
+    elif isinstance(value, list) and all(isinstance(v, list) for v in value):
+        items = value[:count] + [None] * (count - len(value))
+    else:
+        return [None] * count
+
+    return [_validate_items(item) if item is not None else None for item in items]
@@ -0,0 +1,53 @@
+"""
+Transcription Cache
+Qayta yuborilgan/forward qilingan ovozlar uchun transkripsiya keshi (xotira + SQLite)
+Kalit: Telegram file_unique_id va davomiylik
+"""
+from typing import Optional
+
+import config
+from utils.cache import LRUCache
+
+
+def transcription_key(file_unique_id: str, duration: int) -> str:
+    return f"{file_unique_id}:{int(duration or 0)}"
+
+
+class TranscriptionCache:
+    """transcribe_voice natijalari keshi"""
+
+    def __init__(self, maxsize: int = None, persist: bool = None):
+        self.memory = LRUCache(maxsize or config.VOICE_CACHE_SIZE)
+        self.persist = config.AI_CACHE_PERSIST if persist is None else persist
+        self._db = None
+
+    @property
+    def db(self):
+        """SQLite keshi uchun Database (kerak bo'lganda yaratiladi)"""
+        if self._db is None:
+            from database.db import Database
+            self._db = Database()
+        return self._db
+
+    async def get(self, file_unique_id: str, duration: int) -> Optional[str]:
+        """Keshdan matn olish"""
+        if not file_unique_id:
+            return None
+
+        key = transcription_key(file_unique_id, duration)
+        text = self.memory.get(key)
+        if text is None and self.persist:
+            text = await self.db.get_cached_transcription(key, config.AI_CACHE_TTL_DAYS)
+            if text is not None:
+                self.memory.set(key, text)
+        return text
+
+    async def set(self, file_unique_id: str, duration: int, text: str):
+        """Matnni saqlash"""
+        if not file_unique_id or not text:
+            return
+
+        key = transcription_key(file_unique_id, duration)
+        self.memory.set(key, text)
+        if self.persist:
+            await self.db.save_cached_transcription(key, text)
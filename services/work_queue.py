@@ -0,0 +1,174 @@
+"""
+AI Work Queue
+AI so'rovlari uchun umumiy navbat: ustuvorlik, bir vaqtdagi so'rovlar chegarasi
+va foydalanuvchilar orasida navbatma-navbat (round-robin) adolat
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import config
+
+
+class Priority:
+    TRANSACTION = 0  # Interaktiv: matn/ovozli tranzaksiya
+    REPORT = 1       # Haftalik/oylik hisobot
+    DIARY = 2        # Kundalik tahlili
+
+    NAMES = {TRANSACTION: "transaction", REPORT: "report", DIARY: "diary"}
+
+
+class QueueFullError(Exception):
+    """Navbat to'lgan - so'rov qabul qilinmadi"""
+
+
+class _Job:
+    __slots__ = ("user_id", "factory", "future", "enqueued_at")
+
+    def __init__(self, user_id: int, factory: Callable[[], Awaitable[Any]]):
+        self.user_id = user_id
+        self.factory = factory
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+
+class AIWorkQueue:
+    """Ustuvorlikli, hajmi cheklangan AI ishlar navbati"""
+
+    def __init__(self, max_in_flight: int = None, max_queued: int = None):
+        self.max_in_flight = max_in_flight or config.AI_MAX_IN_FLIGHT
+        self.max_queued = max_queued or config.AI_QUEUE_MAX_SIZE
+
+        # Har bir ustuvorlik uchun: user_id -> ishlar (tartib - round-robin navbati)
+        self._queues: Dict[int, "OrderedDict[int, Deque[_Job]]"] = {
+            priority: OrderedDict() for priority in Priority.NAMES
+        }
+        self._queued = 0
+        self.in_flight = 0
+        self._waits: Dict[int, Deque[float]] = {
+            priority: deque(maxlen=200) for priority in Priority.NAMES
+        }
+        self.rejected = 0
+        self._tasks = set()  # Ishlayotgan vazifalar (GC yig'ib olmasligi uchun)
+
+    async def submit(
+        self,
+        user_id: int,
+        priority: int,
+        factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Ishni navbatga qo'yish va natijani kutish
+
+        Args:
+            factory: navbati kelganda chaqiriladigan korutina yaratuvchi
+        Raises:
+            QueueFullError - navbat to'lgan bo'lsa
+        """
+        if self._queued >= self.max_queued:
+            self.rejected += 1
+            raise QueueFullError(f"AI navbati to'lgan ({self._queued})")
+
+        job = _Job(user_id, factory)
+        self._queues[priority].setdefault(user_id, deque()).append(job)
+        self._queued += 1
+        self._dispatch()
+
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            # Kutayotgan foydalanuvchi ketdi - navbatdan olib tashlash
+            self._remove(priority, job)
+            raise
+
+    def _can_start(self) -> bool:
+        return self.in_flight < self.max_in_flight
+
+    def _next_job(self) -> Optional[tuple]:
+        """Eng yuqori ustuvorlikdagi navbatdagi foydalanuvchining birinchi ishi"""
+        for priority, users in self._queues.items():
+            if not users:
+                continue
+            user_id, jobs = next(iter(users.items()))
+            job = jobs.popleft()
+            # Foydalanuvchini navbat oxiriga o'tkazish (round-robin)
+            if jobs:
+                users.move_to_end(user_id)
+            else:
+                del users[user_id]
+            self._queued -= 1
+            return priority, job
+        return None
+
+    def _dispatch(self):
+        """Bo'sh joy bor ekan, navbatdagi ishlarni ishga tushirish"""
+        while self._can_start():
+            item = self._next_job()
+            if item is None:
+                return
+            priority, job = item
+            if job.future.done():
+                continue
+            self._waits[priority].append(time.monotonic() - job.enqueued_at)
+            self.in_flight += 1
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: _Job):
+        try:
+            result = await job.factory()
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def _remove(self, priority: int, job: _Job):
+        users = self._queues[priority]
+        jobs = users.get(job.user_id)
+        if jobs and job in jobs:
+            jobs.remove(job)
+            self._queued -= 1
+            if not jobs:
+                del users[job.user_id]
+
+    def depth(self) -> Dict[str, int]:
+        """Har bir ustuvorlik bo'yicha navbatdagi ishlar soni"""
+        return {
+            Priority.NAMES[priority]: sum(len(jobs) for jobs in users.values())
+            for priority, users in self._queues.items()
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Monitoring uchun: navbat chuqurligi va kutish vaqti (soniya)"""
+        waits = {}
+        for priority, samples in self._waits.items():
+            ordered = sorted(samples)
+            waits[Priority.NAMES[priority]] = {
+                "avg": sum(ordered) / len(ordered) if ordered else 0.0,
+                "p95": ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0,
+            }
+        return {
+            "queued": self._queued,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "depth": self.depth(),
+            "wait": waits,
+        }
+
+
+_queue: Optional[AIWorkQueue] = None
+
+
+def get_work_queue() -> AIWorkQueue:
+    """Barcha handlerlar uchun umumiy navbat"""
+    global _queue
+    if _queue is None:
+        _queue = AIWorkQueue()
+    return _queue
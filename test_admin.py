@@ -75,6 +75,8 @@ async def test_admin_and_export():
     )
     print(f"  PDF fayl: {pdf_file}")
     
+    await db.close()
+    
     print("\n" + "=" * 50)
     print("[SUCCESS] Barcha testlar muvaffaqiyatli!")
     print("=" * 50)
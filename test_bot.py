@@ -3,8 +3,21 @@ Test Script - ARIS Bot
 Bot funksiyalarini test qilish
 """
 import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+from groq import AsyncGroq
+
 from database.models import DatabaseModels
 from database.db import Database
+from services.ai_service import AIService
+from services.circuit_breaker import CircuitBreaker
+from services.local_parser import parse_transactions
+from services.prompts import build_batch_prompt
+from services.response_parser import parse_transactions as parse_response
+from services.rate_limiter import RateScheduler
 import config
 
 async def test_database():
@@ -31,21 +44,236 @@ async def test_database():
     user = await db.get_user(12345)
     print(f"[OK] Tarif o'zgartirildi: {user['subscription_tier']}")
     
+    # O'qish paytida tarif o'zgarsa - eski qator keshga yozilmaydi
+    version = db.user_guard.begin_read(12345)
+    db.user_guard.bump(12345)
+    assert not db.user_guard.end_read(12345, version)
+    assert db.user_guard.end_read(12345, db.user_guard.begin_read(12345))
+    assert not db.user_guard._versions and not db.user_guard._reads
+    print("[OK] User keshi versiyasi")
+    
     # Tranzaksiya qo'shish
     await db.add_transaction(12345, "expense", 50000, "Oziq-ovqat", "Test chiqim")
     await db.add_transaction(12345, "income", 1000000, "Maosh", "Test kirim")
     print("[OK] Tranzaksiyalar qo'shildi")
     
+    # Bir nechta tranzaksiya - bitta commit
+    ids = await db.add_transactions_bulk(12345, [
+        {"type": "expense", "amount": 15000, "category": "Transport", "description": "Taxi"},
+        {"type": "expense", "amount": 5000, "category": "Oziq-ovqat", "description": "Non"},
+    ], service="groq", tokens=100)
+    assert len(ids) == 2 and ids[1] == ids[0] + 1
+    print(f"[OK] Bulk tranzaksiyalar: {ids}")
+    
+    # Token buffer: yozilmagan tokenlar ham oylik hisobga kiradi
+    tokens_before = await db.get_monthly_tokens(12345)
+    await db.track_ai_usage(12345, "groq", 50)
+    assert await db.get_monthly_tokens(12345) == tokens_before + 50
+    await db.usage.flush()
+    assert await db.get_monthly_tokens(12345) == tokens_before + 50
+    # Flush davomida (commit'gacha) yozilayotgan guruh ham ko'rinadi
+    await db.track_ai_usage(12345, "groq", 30)
+    flush = asyncio.create_task(db.usage.flush())
+    await asyncio.sleep(0)
+    assert db.usage.pending_tokens(12345) == 30
+    assert await db.get_monthly_tokens(12345) == tokens_before + 80
+    await flush
+    assert await db.get_monthly_tokens(12345) == tokens_before + 80
+    print("[OK] AI usage buffer")
+    
     # Statistika
     stats = await db.get_statistics(12345)
     print(f"[OK] Statistika: Kirim={stats['total_income']}, Chiqim={stats['total_expense']}")
     
+    # Bir nechta davr - bitta so'rov
+    periods = await db.get_period_statistics(12345)
+    assert periods["this_month"]["total_expense"] == stats["total_expense"]
+    print(f"[OK] Davrlar statistikasi: {', '.join(periods)}")
+    
     # Maqsad qo'shish
     await db.add_goal(12345, "Yangi telefon", 5000000)
     goals = await db.get_goals(12345)
     print(f"[OK] Maqsad qo'shildi: {goals[0]['title']}")
     
+    # Ovoz transkripsiyasi keshi
+    await db.save_cached_transcription("AgADtest:5", "taxi 15000")
+    assert await db.get_cached_transcription("AgADtest:5") == "taxi 15000"
+    assert await db.get_cached_transcription("AgADtest:6") is None
+    print("[OK] Transkripsiya keshi")
+    
+    # Token sarfi namunalari
+    await db.add_token_samples([("groq_1", 350, 60, 120, 80, 0), ("whisper", 0, 0, 0, 0, 12.5)])
+    samples = await db.get_token_samples()
+    assert samples[-1] == (350, 60, 120, 80)
+    print(f"[OK] Token namunalari: {len(samples)}")
+
+    # AI hisobot keshi - yangi maqsad/tranzaksiya uni bekor qiladi
+    report_data = {"total_income": 1000000, "total_expense": 50000}
+    db.report_cache.set(12345, "weekly", "2024-01-01:2024-01-07", report_data, "Tahlil")
+    assert db.report_cache.get(12345, "weekly", "2024-01-01:2024-01-07", dict(reversed(report_data.items()))) == "Tahlil"
+    await db.update_goal_progress(goals[0]["id"], 100000)
+    assert db.report_cache.get(12345, "weekly", "2024-01-01:2024-01-07", report_data) is None
+    for user_id in range(100):
+        db.report_cache.invalidate(user_id)
+    assert len(db.report_cache) == 0
+    print("[OK] Hisobot keshi")
+
+    await db.close()
+    
     print("\n[SUCCESS] Barcha testlar muvaffaqiyatli o'tdi!")
 
+# Lokal parser: matn -> (tur, summa, kategoriya) yoki None (AI'ga yuboriladi)
+LOCAL_PARSER_CASES = [
+    ("taxi 15000", ("expense", 15000, "Transport")),
+    ("non uchun besh ming so'm", ("expense", 5000, "Oziq-ovqat")),
+    ("maosh oldim ikki yarim million", ("income", 2500000, "Maosh")),
+    ("internet 50 ming", ("expense", 50000, "Aloqa")),
+    ("telefon sotdim 2 mln", None),
+    ("oylik ijara 3 million", None),
+    ("kitob 200 dollar", None),
+    ("kitob $200", None),
+    ("2 ta non 5000", None),
+]
+
+
+def test_local_parser():
+    """Lokal parser test"""
+    print("\nLokal parser test boshlandi...")
+    
+    for text, expected in LOCAL_PARSER_CASES:
+        result, confidence = parse_transactions(text)
+        if expected is None:
+            assert result is None or confidence < config.LOCAL_PARSER_MIN_CONFIDENCE, text
+            continue
+        assert confidence >= config.LOCAL_PARSER_MIN_CONFIDENCE, text
+        item = result[0]
+        assert (item["type"], item["amount"], item["category"]) == expected, (text, item)
+    print(f"[OK] Lokal parser: {len(LOCAL_PARSER_CASES)} holat")
+
+
+def _groq_client(handler) -> AsyncGroq:
+    """Soxta HTTP transport bilan Groq client"""
+    return AsyncGroq(
+        api_key="test", max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+
+
+def _completion(text: str) -> httpx.Response:
+    return httpx.Response(200, headers={"x-ratelimit-remaining-requests": "29"}, json={
+        "id": "test", "object": "chat.completion", "created": 0, "model": config.GROQ_MODEL,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    })
+
+
+class _GeminiModel:
+    """Soxta Gemini modeli"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    async def generate_content_async(self, content, **kwargs):
+        metadata = SimpleNamespace(prompt_token_count=7, candidates_token_count=3, total_token_count=10)
+        return SimpleNamespace(text=self.text, usage_metadata=metadata)
+
+
+class _StalledGeminiModel:
+    """Birinchi bo'lakdan keyin to'xtab qoladigan Gemini oqimi"""
+
+    async def _stream(self):
+        yield SimpleNamespace(text="salom ", usage_metadata=None)
+        await asyncio.sleep(60)
+
+    async def generate_content_async(self, content, **kwargs):
+        return self._stream()
+
+
+async def test_ai_providers():
+    """AI provayderlar test (tarmoqsiz)"""
+    print("\nAI provayderlar test boshlandi...")
+    
+    ai = AIService()
+    ai.groq_client_1 = _groq_client(lambda request: _completion("groq javob"))
+    ai.groq_client_2 = _groq_client(lambda request: httpx.Response(500, json={"error": {"message": "xato"}}))
+    ai.gemini_model = _GeminiModel("gemini javob")
+    
+    # Kalit byudjeti va provayder holati handlerlar orasida umumiy
+    other = AIService()
+    assert other.scheduler is ai.scheduler and other.breakers["groq_1"] is ai.breakers["groq_1"]
+    
+    # Groq: javob va haqiqiy token sarfi
+    assert await ai._call_groq("salom", ai.groq_client_1, "groq_1") == ("groq javob", 15)
+    assert await ai._call_groq("salom", ai.groq_client_2, "groq_2") == (None, 0)
+    print("[OK] Groq chaqiruvi")
+    
+    # Gemini
+    assert await ai._call_gemini("salom") == ("gemini javob", 10)
+    print("[OK] Gemini chaqiruvi")
+    
+    # Javob parseri: kasr verguli va minglik ajratuvchi
+    parsed = parse_response('[{"type": "expense", "amount": "2,5", "category": "Transport"}, '
+                            '{"type": "income", "amount": "1,500,000", "category": "Maosh"}]')
+    assert [t["amount"] for t in parsed] == [2.5, 1500000]
+    print("[OK] Javob parseri")
+    
+    # Batch prompt: ko'p qatorli matn keyingi foydalanuvchi matniga aralashmaydi
+    texts = ["non 5000\n2. taxi 15000", "kofe 20000"]
+    assert json.loads(build_batch_prompt(texts).user) == {"1": texts[0], "2": texts[1]}
+    print("[OK] Batch prompt")
+    
+    # Hedging: xato bergan kalitdan keyingisiga o'tiladi
+    ai.groq_client_1 = None
+    assert await ai._hedged_call("salom") == ("gemini javob", 10)
+    assert ai.breakers["groq_2"].error_rate > 0
+    print("[OK] Hedged chaqiruv")
+    
+    # 429: scheduler bloklaydi, breaker xato sifatida hisoblamaydi
+    ai.groq_client_1 = _groq_client(lambda request: httpx.Response(
+        429, headers={"retry-after": "30"}, json={"error": {"message": "rate limit"}}
+    ))
+    providers = dict(ai._providers())
+    assert await ai._timed_call("groq_1", providers["groq_1"], "salom") == (None, 0)
+    assert ai.breakers["groq_1"].error_rate == 0
+    assert not ai.scheduler.has_capacity("groq_1", 10)
+    print("[OK] Rate limit")
+    
+    # Parallel kutayotganlar bitta bo'sh joyni birga egallamaydi
+    scheduler = RateScheduler()
+    budget = scheduler.budgets["groq_1"]
+    budget.requests.capacity, budget.requests.rate = 600.0, 10.0
+    budget.requests.set_remaining(0)
+    started = time.monotonic()
+    await asyncio.gather(*[scheduler.acquire("groq_1", 1) for _ in range(3)])
+    assert time.monotonic() - started >= 0.25
+    print("[OK] RateScheduler navbati")
+    
+    # Half-open: faqat bitta sinov so'rovi
+    breaker = CircuitBreaker("test", cooldown=0.01)
+    breaker._open(time.monotonic() - 1)
+    assert breaker.try_begin() and not breaker.try_begin()
+    breaker.cancel()
+    assert breaker.try_begin()
+    print("[OK] Circuit breaker sinovi")
+    
+    # To'xtab qolgan Gemini oqimi cheksiz kutmaydi
+    ai = AIService(RateScheduler(), {name: CircuitBreaker(name) for name in ("groq_1", "groq_2", "gemini")})
+    ai.groq_client_1 = ai.groq_client_2 = None
+    ai.gemini_model = _StalledGeminiModel()
+    timeout, config.AI_REQUEST_TIMEOUT = config.AI_REQUEST_TIMEOUT, 0.2
+    try:
+        usage = {}
+        parts = [delta async for delta in ai.stream_completion("salom", usage)]
+    finally:
+        config.AI_REQUEST_TIMEOUT = timeout
+    assert parts == ["salom "] and not usage["complete"]
+    assert ai.breakers["gemini"].error_rate > 0
+    print("[OK] Gemini oqimi timeout")
+    
+    print("\n[SUCCESS] AI provayderlar testlari o'tdi!")
+
+
 if __name__ == "__main__":
     asyncio.run(test_database())
+    test_local_parser()
+    asyncio.run(test_ai_providers())
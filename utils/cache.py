@@ -0,0 +1,130 @@
+"""
+LRU Cache
+Hajmi cheklangan, ixtiyoriy TTL bilan xotiradagi kesh
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Eng kam ishlatilganini chiqarib yuboruvchi kesh"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Qiymatni olish (muddati o'tgan bo'lsa - default)"""
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = item
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Qiymatni saqlash"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Qiymatni o'chirish"""
+        item = self._data.pop(key, None)
+        return item[0] if item else default
+
+    def clear(self):
+        """Keshni tozalash"""
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class VersionGuard:
+    """
+    O'qish paytida yozuv bo'lganini aniqlash (eskirgan qatorni keshga yozmaslik uchun)
+    Versiyalar faqat o'qilayotgan kalitlar uchun saqlanadi - lug'at o'smaydi
+    """
+
+    def __init__(self):
+        self._reads: Dict[Hashable, int] = {}
+        self._versions: Dict[Hashable, int] = {}
+
+    def begin_read(self, key: Hashable) -> int:
+        self._reads[key] = self._reads.get(key, 0) + 1
+        return self._versions.get(key, 0)
+
+    def end_read(self, key: Hashable, version: int) -> bool:
+        """Returns: True - o'qish davomida yozuv bo'lmadi (natijani keshlash mumkin)"""
+        unchanged = self._versions.get(key, 0) == version
+        self._reads[key] -= 1
+        if not self._reads[key]:
+            del self._reads[key]
+            self._versions.pop(key, None)
+        return unchanged
+
+    def bump(self, key: Hashable):
+        """Yozuvdan keyin: shu kalitni o'qiyotganlar natijasi keshlanmaydi"""
+        if key in self._reads:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+
+def fingerprint(data: Dict) -> str:
+    """Dict mazmunining qisqa xeshi (kalitlar tartibiga bog'liq emas)"""
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class ReportCache:
+    """
+    AI hisobot tahlillari keshi: (foydalanuvchi, turi, davr, ma'lumot xeshi)
+    Har bir foydalanuvchi - bitta LRU yozuvi (har bir turdan oxirgi tahlil),
+    invalidate() uni butunlay o'chiradi - qo'shimcha holat saqlanmaydi
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        # user_id -> {report_type: (davr, xesh, tahlil)}
+        self._cache = LRUCache(maxsize, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, report_type: str, period: str, data: Dict) -> Optional[str]:
+        item = (self._cache.get(user_id) or {}).get(report_type)
+        if item and item[:2] == (period, fingerprint(data)):
+            self.hits += 1
+            return item[2]
+        self.misses += 1
+        return None
+
+    def set(self, user_id: int, report_type: str, period: str, data: Dict, analysis: str):
+        reports = dict(self._cache.get(user_id) or {})
+        reports[report_type] = (period, fingerprint(data), analysis)
+        self._cache.set(user_id, reports)
+
+    def invalidate(self, user_id: int):
+        """Yangi tranzaksiya/maqsad o'zgarishi - foydalanuvchining barcha hisobotlari o'chiriladi"""
+        self._cache.pop(user_id)
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -0,0 +1,47 @@
+"""
+Progressive Message
+AI javobi oqim bilan kelayotganda xabarni bosqichma-bosqich yangilash
+(Telegram edit limitlariga rioya qilgan holda)
+"""
+import html
+import time
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+
+import config
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+class ProgressiveMessage:
+    """Xabarni `interval` soniyada bir martadan ko'p tahrirlamaydi"""
+
+    def __init__(self, message: Message, prefix: str = "", interval: float = None, min_chars: int = None):
+        self.message = message
+        self.prefix = prefix  # HTML, o'zgarmaydigan qism (masalan, statistika)
+        self.interval = interval or config.STREAM_EDIT_INTERVAL
+        self.min_chars = min_chars or config.STREAM_EDIT_MIN_CHARS
+        self._next_edit = 0.0
+        self._last_length = 0
+
+    async def update(self, text: str, force: bool = False):
+        """To'plangan matn bilan xabarni yangilash (vaqti kelmagan bo'lsa - o'tkazib yuboriladi)"""
+        now = time.monotonic()
+        if not force and (now < self._next_edit or len(text) - self._last_length < self.min_chars):
+            return
+
+        self._next_edit = now + self.interval
+        self._last_length = len(text)
+
+        # Yarim kelgan javobda yopilmagan teglar bo'lishi mumkin - oddiy matn sifatida
+        body = self.prefix + html.escape(text) + " ▌"
+        if len(body) > TELEGRAM_MESSAGE_LIMIT:
+            body = body[:TELEGRAM_MESSAGE_LIMIT - 1] + "…"
+
+        try:
+            await self.message.edit_text(body, parse_mode="HTML")
+        except TelegramRetryAfter as e:
+            self._next_edit = time.monotonic() + e.retry_after
+        except TelegramBadRequest:
+            pass  # "message is not modified" va h.k.
@@ -1,7 +1,85 @@
 """
 Token Counter Utility
 Oddiy matn uchun token hisoblash
+Provayderlar qaytargan haqiqiy token sonlari bo'yicha o'zini kalibrlaydi
 """
+from typing import Iterable, Optional, Tuple
+
+import config
+
+
+class TokenEstimator:
+    """
+    Haqiqiy sarf tarixidan o'rganiladigan baholovchi:
+    prompt_tokens ≈ a * harflar + b * so'zlar (eng kichik kvadratlar, eski namunalar so'nib boradi)
+    javob_tokens - eksponensial o'rtacha
+    """
+
+    def __init__(self, decay: float = 0.995, min_samples: int = None):
+        self.decay = decay
+        self.min_samples = min_samples or config.TOKEN_CALIBRATION_MIN_SAMPLES
+        self.samples = 0
+        # Normal tenglamalar uchun yig'indilar
+        self._cc = self._cw = self._ww = self._cy = self._wy = 0.0
+        self.coefficients: Optional[Tuple[float, float]] = None
+        self.completion_average = float(config.AI_COMPLETION_TOKENS_ESTIMATE)
+
+    def observe(self, text: str, prompt_tokens: int, completion_tokens: int = None):
+        """Bitta haqiqiy natijani qo'shish"""
+        self.observe_counts(len(text or ""), len((text or "").split()), prompt_tokens, completion_tokens)
+
+    def observe_counts(self, chars: int, words: int, prompt_tokens: int, completion_tokens: int = None):
+        """Matn o'lchamlari bo'yicha natija qo'shish"""
+        if completion_tokens:
+            self.completion_average += 0.1 * (completion_tokens - self.completion_average)
+        if not chars or not prompt_tokens:
+            return
+
+        chars = float(chars)
+        words = float(words)
+        d = self.decay
+        self._cc = self._cc * d + chars * chars
+        self._cw = self._cw * d + chars * words
+        self._ww = self._ww * d + words * words
+        self._cy = self._cy * d + chars * prompt_tokens
+        self._wy = self._wy * d + words * prompt_tokens
+        self.samples += 1
+
+        if self.samples >= self.min_samples:
+            self._fit()
+
+    def _fit(self):
+        determinant = self._cc * self._ww - self._cw * self._cw
+        if determinant <= 1e-9:
+            return
+        a = (self._cy * self._ww - self._wy * self._cw) / determinant
+        b = (self._wy * self._cc - self._cy * self._cw) / determinant
+        if a > 0 and b >= 0:
+            self.coefficients = (a, b)
+        elif self._cc:
+            # Faqat harflar bo'yicha
+            self.coefficients = (self._cy / self._cc, 0.0)
+
+    def load(self, samples: Iterable[Tuple[int, int, int, int]]):
+        """Saqlangan tarixdan o'rganish: (harflar, so'zlar, prompt, javob) qatorlari (eskisidan yangisiga)"""
+        for chars, words, prompt_tokens, completion_tokens in samples:
+            self.observe_counts(chars, words, prompt_tokens, completion_tokens)
+
+    def estimate(self, text: str) -> Optional[int]:
+        """Kalibrlangan baho (yetarli ma'lumot bo'lmasa - None)"""
+        if not self.coefficients:
+            return None
+        a, b = self.coefficients
+        return int(a * len(text) + b * len(text.split()))
+
+
+estimator = TokenEstimator()
+
+
+def estimate_request_tokens(prompt: str) -> int:
+    """So'rov uchun oldindan baho: prompt + kutilayotgan javob"""
+    return estimate_tokens(prompt) + int(estimator.completion_average)
+
 
 def estimate_tokens(text: str, language: str = "uzbek") -> int:
     """
@@ -17,6 +95,10 @@ def estimate_tokens(text: str, language: str = "uzbek") -> int:
     if not text:
         return 0
     
+    calibrated = estimator.estimate(text)
+    if calibrated is not None:
+        return calibrated
+    
     # Har xil tillar uchun koeffitsiyentlar
     # 1 token ≈ N harf
     coefficients = {